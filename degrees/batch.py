@@ -0,0 +1,127 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+import time
+
+import degrees
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer degrees of separation queries in bulk."
+    )
+    parser.add_argument("directory", help="dataset directory")
+    parser.add_argument("queries",
+                        help="CSV or JSONL file of source, target pairs")
+    parser.add_argument("-o", "--output",
+                        help="JSONL file to write (default: standard output)")
+    parser.add_argument("-w", "--workers", type=int,
+                        default=multiprocessing.cpu_count(),
+                        help="number of worker processes")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory)
+    queries = read_queries(args.queries)
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        count = run(args.directory, queries, output, args.workers)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    seconds = time.perf_counter() - start
+
+    rate = count / seconds if seconds else float("inf")
+    print(f"{count} queries in {seconds:.3f} s ({rate:.1f} queries/sec)",
+          file=sys.stderr)
+
+
+def read_queries(filename):
+    """
+    Returns (source, target) pairs read from a CSV file with
+    `source` and `target` columns, or from a JSONL file of objects
+    with `source` and `target` keys.
+    """
+    with open(filename, encoding="utf-8") as f:
+        if filename.endswith((".jsonl", ".json")):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        return [(row["source"], row["target"]) for row in rows]
+
+
+def run(directory, queries, output, workers):
+    """
+    Answer all queries, writing one JSON line per query to `output`.
+    Queries sharing a source are answered from a single search tree.
+    Returns the number of queries answered.
+    """
+    groups = {}
+    count = 0
+    for source, target in queries:
+        source_id, target_id = resolve(source), resolve(target)
+        if source_id is None or target_id is None:
+            write(output, {"source": source, "target": target,
+                           "error": "person not found"})
+            count += 1
+            continue
+        groups.setdefault(source_id, []).append((source, target, target_id))
+
+    with multiprocessing.Pool(workers, initializer=initialize,
+                              initargs=(directory,)) as pool:
+        for results in pool.imap_unordered(answer_group, groups.items()):
+            for result in results:
+                write(output, result)
+            count += len(results)
+    return count
+
+
+def resolve(person):
+    """
+    Returns the person id for a person id or an unambiguous name,
+    or None.
+    """
+    if person in degrees.people:
+        return person
+    person_ids = degrees.names.get(person.lower(), set())
+    if len(person_ids) == 1:
+        return next(iter(person_ids))
+    return None
+
+
+def initialize(directory):
+    # Workers forked from the parent already share its data
+    if not degrees.people:
+        degrees.load_data(directory)
+
+
+def answer_group(group):
+    """
+    Answer every query of one source from one search tree.
+    """
+    source_id, queries = group
+    tree = degrees.search_tree(source_id, [target for _, _, target in queries])
+    results = []
+    for source, target, target_id in queries:
+        if target_id == source_id:
+            path = degrees.shortest_path(source_id, target_id)
+        else:
+            path = degrees.path_in_tree(tree, target_id)
+        results.append({
+            "source": source,
+            "target": target,
+            "degrees": None if path is None else len(path),
+            "path": path
+        })
+    return results
+
+
+def write(output, result):
+    output.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
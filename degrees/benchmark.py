@@ -0,0 +1,264 @@
+import csv
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from array import array
+
+import degrees
+import snapshot
+from graph import INDEX, Graph
+from util import Node, QueueFrontier
+
+# Seconds after which a single legacy search is abandoned
+LEGACY_DEADLINE = 30
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+
+    print(f"Loading {directory}")
+    benchmark_load(directory)
+
+    print(f"Searching {directory}")
+    degrees.load_data(directory)
+    benchmark_search(pairs(degrees.graph, 100))
+    compare_bidirectional(pairs(degrees.graph, 100))
+    benchmark_oracle(pairs(degrees.graph, 100))
+
+    print("Searching synthetic graph (1,000,000 edges)")
+    synthetic(people=250000, movies=100000, edges=1000000)
+    benchmark_search(pairs(degrees.graph, 10))
+    compare_bidirectional(pairs(degrees.graph, 10))
+    benchmark_oracle(pairs(degrees.graph, 1000))
+
+
+def benchmark_load(directory):
+    """
+    Report load time and memory of the dict representation
+    against the compact graph.
+    """
+    loaders = [("dicts", load_dicts), ("graph", load_graph)]
+    if snapshot.load(directory, Graph()):
+        loaders.append(("snapshot", load_snapshot))
+    for label, loader in loaders:
+        seconds = timed(loader, directory)
+        peak, current = traced(loader, directory)
+        print(f"  {label:<8} {seconds:8.3f} s  "
+              f"{current / 2 ** 20:9.1f} MiB resident  "
+              f"{peak / 2 ** 20:9.1f} MiB peak")
+
+
+def benchmark_search(queries):
+    """
+    Report BFS time over `queries`, a list of (source, target)
+    person id pairs, before and after the frontier rework.
+    """
+    for label, search in [
+        ("legacy", legacy_shortest_path),
+        ("indexed", degrees.shortest_path)
+    ]:
+        start = time.perf_counter()
+        for source, target in queries:
+            try:
+                search(source, target)
+            except TimeoutError:
+                print(f"  {label:<8} gave up after {LEGACY_DEADLINE} s")
+                break
+        else:
+            seconds = time.perf_counter() - start
+            print(f"  {label:<8} {seconds:8.3f} s  "
+                  f"({len(queries)} searches)")
+
+
+def compare_bidirectional(queries):
+    """
+    Check that bidirectional search finds paths as short as BFS
+    over `queries`, and report both times.
+    """
+    for bidirectional in [False, True]:
+        start = time.perf_counter()
+        lengths = [
+            path_length(degrees.shortest_path(source, target, bidirectional))
+            for source, target in queries
+        ]
+        seconds = time.perf_counter() - start
+        label = "bidirectional" if bidirectional else "bfs"
+        print(f"  {label:<13} {seconds:8.3f} s  ({len(queries)} searches)")
+        if bidirectional and lengths != expected:
+            sys.exit("Bidirectional search disagrees with BFS.")
+        expected = lengths
+
+
+def benchmark_oracle(queries):
+    """
+    Build landmark tables, then report bound query time,
+    how often the bounds meet, and check them against search.
+    """
+    start = time.perf_counter()
+    degrees.oracle.build(degrees.graph)
+    print(f"  landmarks     {time.perf_counter() - start:8.3f} s  "
+          f"({len(degrees.oracle.landmarks)} searches)")
+
+    start = time.perf_counter()
+    bounds = [degrees.distance_bounds(s, t) for s, t in queries]
+    seconds = time.perf_counter() - start
+    exact = sum(1 for b in bounds if b is None or b[0] == b[1])
+    print(f"  bounds        {seconds / len(queries) * 1e6:8.1f} us/query  "
+          f"({exact} of {len(queries)} exact)")
+
+    for (source, target), bound in zip(queries[:100], bounds):
+        length = path_length(degrees.shortest_path(source, target, True))
+        if source == target:
+            length = 0
+        if bound is None:
+            ok = length is None
+        else:
+            ok = length is not None and bound[0] <= length and (
+                bound[1] is None or length <= bound[1]
+            )
+        if not ok:
+            sys.exit("Landmark bounds disagree with search.")
+    degrees.oracle.clear()
+
+
+def path_length(path):
+    return None if path is None else len(path)
+
+
+def pairs(graph, n, seed=0):
+    """Returns `n` random (source, target) person id pairs."""
+    rng = random.Random(seed)
+    ids = graph.person_ids
+    return [
+        (ids[rng.randrange(len(ids))], ids[rng.randrange(len(ids))])
+        for _ in range(n)
+    ]
+
+
+def synthetic(people, movies, edges, seed=0):
+    """
+    Replace the loaded degrees data with a random graph
+    of `edges` distinct star credits.
+    """
+    rng = random.Random(seed)
+    credits = set()
+    while len(credits) < edges:
+        credits.add((rng.randrange(people), rng.randrange(movies)))
+    degrees.graph.build(
+        [str(i) for i in range(people)],
+        [f"Person {i}" for i in range(people)],
+        ["" for _ in range(people)],
+        [str(i) for i in range(movies)],
+        [f"Movie {i}" for i in range(movies)],
+        ["" for _ in range(movies)],
+        array(INDEX, (p for p, _ in credits)),
+        array(INDEX, (m for _, m in credits))
+    )
+
+
+def legacy_shortest_path(source, target):
+    """
+    The original search: list-backed queue, linear frontier scans
+    and linear explored-set scans. Raises TimeoutError past the deadline.
+    """
+    deadline = time.perf_counter() + LEGACY_DEADLINE
+    start = Node(state=(None, source), parent=None, action=None)
+    frontier = QueueFrontier()
+    frontier.add(start)
+    explored = set()
+
+    while not frontier.empty():
+        if time.perf_counter() > deadline:
+            raise TimeoutError
+        node = frontier.remove()
+        explored.add(node.state)
+        for person in degrees.neighbors_for_person(node.state[1]):
+            if target == person[1]:
+                path = [person]
+                while node.parent is not None:
+                    path.append(node.state)
+                    node = node.parent
+                path.reverse()
+                return path
+            if not frontier.contains_state(person) and not any(
+                state[1] == person[1] for state in explored
+            ):
+                frontier.add(Node(state=person, parent=node, action=None))
+    return None
+
+
+def timed(function, *args):
+    """Returns the seconds taken by `function(*args)`."""
+    gc.collect()
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def traced(function, *args):
+    """
+    Returns (peak bytes, bytes still held by the result)
+    allocated while running `function(*args)`.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = function(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak, current
+
+
+def load_graph(directory):
+    graph = Graph()
+    graph.load(directory)
+    return graph
+
+
+def load_snapshot(directory):
+    graph = Graph()
+    snapshot.load(directory, graph)
+    return graph
+
+
+def load_dicts(directory):
+    """
+    Load data into the original nested dictionaries of sets.
+    """
+    names, people, movies = {}, {}, {}
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            people[row["id"]] = {
+                "name": row["name"],
+                "birth": row["birth"],
+                "movies": set()
+            }
+            names.setdefault(row["name"].lower(), set()).add(row["id"])
+
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"],
+                "stars": set()
+            }
+
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                people[row["person_id"]]["movies"].add(row["movie_id"])
+                movies[row["movie_id"]]["stars"].add(row["person_id"])
+            except KeyError:
+                pass
+    return names, people, movies
+
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,47 @@
-import csv
 import sys
+from collections import deque
 
-from util import Node, StackFrontier, QueueFrontier
+import nameindex
+import snapshot
+from graph import Graph, MoviesView, NamesView, PeopleView
+from landmarks import Oracle
+from util import Node, IndexedQueueFrontier
+
+# Integer-indexed store backing the mappings below
+graph = Graph()
 
 # Maps names to a set of corresponding person_ids
-names = {}
+names = NamesView(graph)
 
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
+people = PeopleView(graph)
 
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
+movies = MoviesView(graph)
+
+# Landmark distances bounding degrees of separation, when precomputed
+oracle = Oracle()
 
 
 def load_data(directory):
     """
-    Load data from CSV files into memory.
-    """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    Load data into memory, memory-mapping the compiled snapshot
+    when an up-to-date one exists and parsing the CSV files otherwise.
+    """
+    if not snapshot.load(directory, graph):
+        graph.load(directory)
+    if not oracle.load(directory, graph):
+        oracle.clear()
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    bidirectional = "--bidirectional" in args
+    if bidirectional:
+        args.remove("--bidirectional")
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [--bidirectional] [directory]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
@@ -69,7 +55,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional)
 
     if path is None:
         print("Not connected.")
@@ -84,18 +70,21 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
     """
+    if bidirectional and source != target:
+        return bidirectional_path(source, target)
 
     start = Node(state=(None, source), parent=None, action=None)
-    frontier = QueueFrontier()
+    frontier = IndexedQueueFrontier()
     frontier.add(start)
 
+    # Person ids already expanded
     explored = set()
 
     while True:
@@ -104,10 +93,10 @@ def shortest_path(source, target):
             return None
 
         node = frontier.remove()
-        explored.add(node.state)
-        
+        explored.add(node.state[1])
+
         neighbors = neighbors_for_person(node.state[1])
-         
+
         for person in neighbors:
             if target == person[1]:
                 path = []
@@ -118,35 +107,208 @@ def shortest_path(source, target):
                 path.reverse()
                 return path
             else:
-                if not frontier.contains_state(person) and not in_explored(person, explored):
-                    child = Node(state=person, parent=node, action=neighbors_for_person(node.state[1]))
+                if not frontier.contains_state(person) and person[1] not in explored:
+                    child = Node(state=person, parent=node, action=person[0])
                     frontier.add(child)
 
 
+def degrees_of_separation(source, target):
+    """
+    Returns the number of degrees separating the source from the target,
+    or None if they are not connected.
+
+    Answers from the landmark bounds when they meet,
+    and falls back to searching otherwise.
+    """
+    bounds = distance_bounds(source, target)
+    if bounds is None:
+        return None
+    lower, upper = bounds
+    if lower == upper:
+        return upper
+    path = shortest_path(source, target, bidirectional=True)
+    return None if path is None else len(path)
+
+
+def distance_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees separating the source
+    from the target, with upper None if unknown, or None if they are
+    known not to be connected or either is not in the graph.
+    """
+    return oracle.bounds(graph.person_index(source), graph.person_index(target))
+
+
+def bidirectional_path(source, target):
+    """
+    Returns the same as shortest_path, searching breadth-first
+    from the source and the target alternately, always expanding
+    the smaller of the two frontiers.
+    """
+
+    # Maps each person reached from one end to (movie_id, person_id, depth)
+    # for the step back towards that end
+    forward = {source: (None, None, 0)}
+    backward = {target: (None, None, 0)}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand(
+                forward_frontier, forward, backward
+            )
+        else:
+            backward_frontier, meeting = expand(
+                backward_frontier, backward, forward
+            )
+        if meeting is not None:
+            return join(meeting, forward, backward)
+
+    return None
+
+
+def expand(frontier, reached, other):
+    """
+    Expands a whole level of one side of a bidirectional search.
+    Returns the next level and the person where the two sides meet
+    on the shortest path, or None if they have not met.
+    """
+    level = []
+    best = None
+    for person_id in frontier:
+        depth = reached[person_id][2] + 1
+        for movie_id, neighbor in neighbors_for_person(person_id):
+            if neighbor in reached:
+                continue
+            reached[neighbor] = (movie_id, person_id, depth)
+            level.append(neighbor)
+            if neighbor in other:
+                length = depth + other[neighbor][2]
+                if best is None or length < best[0]:
+                    best = (length, neighbor)
+    return level, None if best is None else best[1]
+
+
+def join(meeting, forward, backward):
+    """
+    Returns the (movie_id, person_id) path through `meeting`.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id][1] is not None:
+        movie_id, previous, _ = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = previous
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id][1] is not None:
+        movie_id, person_id, _ = backward[person_id]
+        path.append((movie_id, person_id))
+    return path
+
+
+def search_tree(source, targets=None):
+    """
+    Returns a breadth-first search tree from the source, mapping
+    the index of each person reached to the (movie, person) index pair
+    of the step leading back towards the source, or None for the source.
+
+    If `targets` (person ids) is given, stops once all have been reached.
+    """
+    root = graph.person_index(source)
+    tree = {root: None}
+    remaining = None
+    if targets is not None:
+        remaining = {graph.person_index(target) for target in targets}
+        remaining.discard(root)
+    frontier = deque([root])
+
+    while frontier and remaining != set():
+        person = frontier.popleft()
+        for movie in graph.movies_for(person):
+            for star in graph.stars_for(movie):
+                if star not in tree:
+                    tree[star] = (movie, person)
+                    frontier.append(star)
+                    if remaining is not None:
+                        remaining.discard(star)
+
+    return tree
+
+
+def path_in_tree(tree, target):
+    """
+    Returns the (movie_id, person_id) path from the root of a search tree
+    to the target, or None if the tree does not reach the target.
+    """
+    person = graph.person_index(target)
+    if person not in tree:
+        return None
+    path = []
+    while tree[person] is not None:
+        movie, previous = tree[person]
+        path.append((graph.movie_ids[movie], graph.person_ids[person]))
+        person = previous
+    path.reverse()
+    return path
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
-    if len(person_ids) == 0:
+    candidates = person_candidates(name)
+    if len(candidates) == 0:
         return None
-    elif len(person_ids) > 1:
+    elif len(candidates) > 1:
         print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+        for candidate in candidates:
+            print(f"ID: {candidate['id']}, Name: {candidate['name']}, "
+                  f"Birth: {candidate['birth']}")
         try:
             person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
+            if person_id in [candidate["id"] for candidate in candidates]:
                 return person_id
         except ValueError:
             pass
         return None
     else:
-        return person_ids[0]
+        return candidates[0]["id"]
+
+
+def person_candidates(name):
+    """
+    Returns every person with exactly that name, ignoring case,
+    as dictionaries of id, name, birth and movie count.
+    """
+    return [
+        nameindex.describe(graph, person)
+        for person in graph.people_named(name)
+    ]
+
+
+def search_people(query, limit=10, prefix=False):
+    """
+    Returns up to `limit` people matching the query, as dictionaries of
+    id, name, birth, movie count and edit distance from the query.
+
+    With `prefix`, returns people whose name starts with the query.
+    Otherwise returns the closest names within a small edit distance.
+    """
+    if prefix:
+        matches = [
+            (0, person)
+            for person in nameindex.prefix_search(graph, query, limit)
+        ]
+    else:
+        matches = nameindex.fuzzy_search(graph, query, limit)
+    return [
+        dict(nameindex.describe(graph, person), distance=distance)
+        for distance, person in matches
+    ]
 
 
 def neighbors_for_person(person_id):
@@ -154,16 +316,11 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
-
-
-def in_explored(person, exp_set):
-        return any(state[1] == person[1] for state in exp_set)
+    person = graph.person_index(person_id)
+    return {
+        (graph.movie_ids[movie], graph.person_ids[star])
+        for movie, star in graph.neighbors(person)
+    }
 
 
 if __name__ == "__main__":
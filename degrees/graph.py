@@ -0,0 +1,294 @@
+import bisect
+import csv
+from array import array
+from collections.abc import Mapping
+
+# Type code for every integer array in the graph (32-bit signed int)
+INDEX = "i"
+
+
+class Graph():
+    """
+    Compact, integer-indexed store for the people/movies/stars graph.
+
+    People and movies are interned to consecutive integers in file order.
+    Adjacency is kept in CSR form: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and the stars
+    of movie `m` are `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Forget all loaded data."""
+        self.build([], [], [], [], [], [], array(INDEX), array(INDEX))
+
+    def build(self, person_ids, person_names, person_births,
+              movie_ids, movie_titles, movie_years,
+              star_people, star_movies):
+        """
+        Replace the graph contents.
+
+        `star_people` and `star_movies` are parallel integer sequences
+        giving one (person index, movie index) edge per position.
+        """
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+
+        self.person_offsets, self.person_movies = csr(
+            len(person_ids), star_people, star_movies
+        )
+        self.movie_offsets, self.movie_stars = csr(
+            len(movie_ids), star_movies, star_people
+        )
+
+        # Sorted permutations used for id and name lookups
+        self.person_order = sorted_order(person_ids)
+        self.movie_order = sorted_order(movie_ids)
+        self.name_order = sorted_order(person_names, key=str.lower)
+
+        # Lowercase names in name order, to search without lowering again
+        self.sorted_names = [person_names[i].lower() for i in self.name_order]
+
+    def load(self, directory):
+        """
+        Load data from CSV files into the graph.
+        """
+        person_ids, person_names, person_births = [], [], []
+        person_index = {}
+        for person_id, name, birth in read_columns(
+            f"{directory}/people.csv", "id", "name", "birth"
+        ):
+            if person_id not in person_index:
+                person_index[person_id] = len(person_ids)
+                person_ids.append(person_id)
+                person_names.append(name)
+                person_births.append(birth)
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        movie_index = {}
+        for movie_id, title, year in read_columns(
+            f"{directory}/movies.csv", "id", "title", "year"
+        ):
+            if movie_id not in movie_index:
+                movie_index[movie_id] = len(movie_ids)
+                movie_ids.append(movie_id)
+                movie_titles.append(title)
+                movie_years.append(year)
+
+        # Duplicate rows collapse, just like the sets they replace
+        edges = set()
+        for person_id, movie_id in read_columns(
+            f"{directory}/stars.csv", "person_id", "movie_id"
+        ):
+            try:
+                edges.add((person_index[person_id], movie_index[movie_id]))
+            except KeyError:
+                pass
+        star_people = array(INDEX, (p for p, _ in edges))
+        star_movies = array(INDEX, (m for _, m in edges))
+
+        self.build(person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years,
+                   star_people, star_movies)
+
+    def person_index(self, person_id):
+        """Returns the integer index of `person_id`, or None."""
+        return find(self.person_order, self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """Returns the integer index of `movie_id`, or None."""
+        return find(self.movie_order, self.movie_ids, movie_id)
+
+    def people_named(self, name):
+        """Returns the indices of people whose name matches, ignoring case."""
+        name = name.lower()
+        lo = bisect.bisect_left(self.sorted_names, name)
+        hi = bisect.bisect_right(self.sorted_names, name, lo)
+        return [self.name_order[i] for i in range(lo, hi)]
+
+    def movies_for(self, person):
+        """Returns the movie indices of a person index."""
+        offsets = self.person_offsets
+        return self.person_movies[offsets[person]:offsets[person + 1]]
+
+    def stars_for(self, movie):
+        """Returns the person indices of a movie index."""
+        offsets = self.movie_offsets
+        return self.movie_stars[offsets[movie]:offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) index pairs for people
+        who starred with a given person index.
+        """
+        neighbors = set()
+        for movie in self.movies_for(person):
+            for star in self.stars_for(movie):
+                neighbors.add((movie, star))
+        return neighbors
+
+
+class PeopleView(Mapping):
+    """
+    Read-only `people` mapping over a graph: person_id to a dictionary
+    of name, birth, movies (a set of movie_ids).
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[m] for m in graph.movies_for(person)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+    def __contains__(self, person_id):
+        return self.graph.person_index(person_id) is not None
+
+
+class MoviesView(Mapping):
+    """
+    Read-only `movies` mapping over a graph: movie_id to a dictionary
+    of title, year, stars (a set of person_ids).
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index(movie_id)
+        if movie is None:
+            raise KeyError(movie_id)
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[p] for p in graph.stars_for(movie)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+    def __contains__(self, movie_id):
+        return self.graph.movie_index(movie_id) is not None
+
+
+class NamesView(Mapping):
+    """
+    Read-only `names` mapping over a graph: lowercase name to a set of
+    corresponding person_ids.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        people = self.graph.people_named(name)
+        if not people or name != name.lower():
+            raise KeyError(name)
+        return {self.graph.person_ids[p] for p in people}
+
+    def __iter__(self):
+        previous = None
+        for person in self.graph.name_order:
+            name = self.graph.person_names[person].lower()
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, name):
+        try:
+            self[name]
+        except KeyError:
+            return False
+        return True
+
+
+def read_columns(filename, *columns):
+    """
+    Yields tuples of the named `columns` from each row of a CSV file.
+    """
+    with open(filename, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(column) for column in columns]
+        for row in reader:
+            # Like csv.DictReader, skip blank lines and fill short rows
+            if not row:
+                continue
+            yield tuple(row[i] if i < len(row) else None for i in positions)
+
+
+def csr(size, sources, targets):
+    """
+    Group `targets` by `sources` with a counting sort.
+    Returns (offsets, values) arrays where the values for source `i`
+    are `values[offsets[i]:offsets[i + 1]]`.
+    """
+    offsets = array(INDEX, bytes(array(INDEX).itemsize * (size + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    values = array(INDEX, bytes(array(INDEX).itemsize * len(targets)))
+    position = array(INDEX, offsets[:-1])
+    for source, target in zip(sources, targets):
+        values[position[source]] = target
+        position[source] += 1
+    return offsets, values
+
+
+def sorted_order(values, key=None):
+    """Returns an array of the indices of `values` in sorted order."""
+    if key is None:
+        return array(INDEX, sorted(range(len(values)),
+                                   key=values.__getitem__))
+    return array(INDEX, sorted(range(len(values)),
+                               key=lambda i: key(values[i])))
+
+
+def equal_range(order, values, value, key=None):
+    """
+    Returns the (lo, hi) positions in `order` whose values equal `value`,
+    given that `order` sorts `values` by `key`.
+    """
+    if key is None:
+        def lookup(i):
+            return values[i]
+    else:
+        def lookup(i):
+            return key(values[i])
+    lo = bisect.bisect_left(order, value, key=lookup)
+    hi = bisect.bisect_right(order, value, lo=lo, key=lookup)
+    return lo, hi
+
+
+def find(order, values, value):
+    """Returns the index of `value` in `values` using `order`, or None."""
+    lo, hi = equal_range(order, values, value)
+    return order[lo] if lo < hi else None
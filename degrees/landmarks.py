@@ -0,0 +1,184 @@
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+import snapshot
+from graph import Graph
+
+# File layout: fixed preamble, JSON header, then one distance table per landmark
+MAGIC = b"DEGRLMKS"
+VERSION = 1
+PREAMBLE = struct.Struct("<8sII")
+
+FILENAME = "landmarks.bin"
+
+# Distance recorded for people a landmark cannot reach
+UNREACHABLE = 255
+
+# Number of landmarks chosen by default
+LANDMARKS = 16
+
+
+def main():
+    if not 2 <= len(sys.argv) <= 3:
+        sys.exit("Usage: python landmarks.py directory [landmarks]")
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else LANDMARKS
+
+    print("Loading data...")
+    graph = Graph()
+    if not snapshot.load(directory, graph):
+        graph.load(directory)
+    print("Data loaded.")
+
+    start = time.perf_counter()
+    oracle = Oracle()
+    oracle.build(graph, count)
+    print(f"Searched from {count} landmarks in "
+          f"{time.perf_counter() - start:.3f} s.")
+    print(f"Landmarks written to {oracle.save(directory, graph)}.")
+
+
+class Oracle():
+    """
+    Distance oracle over the breadth-first distances from a few
+    well-connected landmark people to everyone else, one byte each.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Forget all landmarks."""
+        self.landmarks = []
+        self.tables = []
+
+    def build(self, graph, count=LANDMARKS):
+        """
+        Choose the `count` people with the most co-star credits
+        as landmarks and search from each of them.
+        """
+        self.landmarks = select(graph, count)
+        self.tables = [distances(graph, person) for person in self.landmarks]
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation
+        between two person indices, with upper None if unbounded.
+        Returns None if the landmarks prove them not connected, or if
+        either index is None, as for a person not in the graph.
+        """
+        if source is None or target is None:
+            return None
+        if source == target:
+            return 0, 0
+        lower, upper = 1, None
+        for table in self.tables:
+            s, t = table[source], table[target]
+            if s == UNREACHABLE and t == UNREACHABLE:
+                continue
+            if s == UNREACHABLE or t == UNREACHABLE:
+                return None
+            lower = max(lower, abs(s - t))
+            if upper is None or s + t < upper:
+                upper = s + t
+        return lower, upper
+
+    def save(self, directory, graph):
+        """
+        Write the landmark tables next to the dataset in `directory`.
+        Returns the path written.
+        """
+        header = json.dumps({
+            "sources": snapshot.fingerprints(directory),
+            "people": len(graph.person_ids),
+            "landmarks": [graph.person_ids[p] for p in self.landmarks]
+        }).encode("utf-8")
+        path = os.path.join(directory, FILENAME)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            for table in self.tables:
+                f.write(table)
+        os.replace(temporary, path)
+        return path
+
+    def load(self, directory, graph):
+        """
+        Memory-map the landmark tables saved in `directory`.
+        Returns False, leaving the oracle untouched, if there are none
+        or they are out of date with the dataset.
+        """
+        try:
+            f = open(os.path.join(directory, FILENAME), "rb")
+        except FileNotFoundError:
+            return False
+        with f:
+            if os.fstat(f.fileno()).st_size < PREAMBLE.size:
+                return False
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, length = PREAMBLE.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            return False
+        header = json.loads(bytes(data[PREAMBLE.size:PREAMBLE.size + length]))
+        people = len(graph.person_ids)
+        if (header["people"] != people
+                or not snapshot.up_to_date(directory, header["sources"])):
+            return False
+
+        view = memoryview(data)
+        base = PREAMBLE.size + length
+        self.landmarks = [graph.person_index(p) for p in header["landmarks"]]
+        self.tables = [
+            view[base + i * people:base + (i + 1) * people]
+            for i in range(len(self.landmarks))
+        ]
+        return True
+
+
+def select(graph, count):
+    """
+    Returns the indices of the `count` people with the most co-star credits.
+    """
+    def credits(person):
+        return sum(
+            graph.movie_offsets[movie + 1] - graph.movie_offsets[movie] - 1
+            for movie in graph.movies_for(person)
+        )
+    return heapq.nlargest(count, range(len(graph.person_ids)), key=credits)
+
+
+def distances(graph, root):
+    """
+    Returns a bytearray of breadth-first distances from a person index
+    to every person, capped below UNREACHABLE.
+    """
+    table = bytearray([UNREACHABLE]) * len(graph.person_ids)
+    expanded = bytearray(len(graph.movie_ids))
+    table[root] = 0
+    frontier = [root]
+    depth = 0
+    while frontier:
+        depth = min(depth + 1, UNREACHABLE - 1)
+        level = []
+        for person in frontier:
+            for movie in graph.movies_for(person):
+                if expanded[movie]:
+                    continue
+                expanded[movie] = 1
+                for star in graph.stars_for(movie):
+                    if table[star] == UNREACHABLE:
+                        table[star] = depth
+                        level.append(star)
+        frontier = level
+    return table
+
+
+if __name__ == "__main__":
+    main()
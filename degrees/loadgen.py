@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import degrees
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure latency of a running degrees server."
+    )
+    parser.add_argument("directory", nargs="?", default="large",
+                        help="dataset directory the server was started with")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("-n", "--requests", type=int, default=1000,
+                        help="total number of requests")
+    parser.add_argument("-c", "--concurrency", type=int, default=8,
+                        help="number of concurrent connections")
+    parser.add_argument("--pairs", type=int, default=100,
+                        help="distinct (source, target) pairs to draw from")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory)
+    rng = random.Random(args.seed)
+    ids = degrees.graph.person_ids
+    pairs = [
+        (ids[rng.randrange(len(ids))], ids[rng.randrange(len(ids))])
+        for _ in range(args.pairs)
+    ]
+    paths = [
+        f"/path?source={source}&target={target}"
+        for source, target in (rng.choice(pairs) for _ in range(args.requests))
+    ]
+
+    latencies, seconds = asyncio.run(
+        run(args.host, args.port, paths, args.concurrency)
+    )
+    latencies.sort()
+    print(f"{len(latencies)} requests in {seconds:.3f} s "
+          f"({len(latencies) / seconds:.1f} requests/sec)")
+    for p in [50, 90, 99]:
+        print(f"  p{p}: {percentile(latencies, p) * 1000:.2f} ms")
+    print(f"  max: {latencies[-1] * 1000:.2f} ms")
+
+    status, body = asyncio.run(fetch_once(args.host, args.port, "/metrics"))
+    print(f"Server metrics: {json.dumps(body)}")
+
+
+async def run(host, port, paths, concurrency):
+    """
+    Issue GET requests for `paths` over `concurrency` keep-alive
+    connections. Returns (per-request latencies, total seconds).
+    """
+    queue = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+    latencies = []
+
+    async def worker():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while not queue.empty():
+                path = queue.get_nowait()
+                start = time.perf_counter()
+                await fetch(reader, writer, path)
+                latencies.append(time.perf_counter() - start)
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+async def fetch_once(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return await fetch(reader, writer, path)
+    finally:
+        writer.close()
+
+
+async def fetch(reader, writer, path):
+    """
+    Send one GET request and return (status line, JSON body).
+    """
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    status = (await reader.readline()).decode("latin-1").strip()
+    length = 0
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+def percentile(values, p):
+    """Returns the `p`th percentile of sorted `values`."""
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import bisect
+import heapq
+
+# Largest range of names finished one by one rather than split further
+LEAVES = 4
+
+
+def prefix_range(graph, prefix):
+    """
+    Returns the (lo, hi) positions in `graph.name_order` of the people
+    whose lowercase name starts with `prefix`.
+    """
+    names = graph.sorted_names
+    prefix = prefix.lower()
+    lo = bisect.bisect_left(names, prefix)
+    if not prefix:
+        return lo, len(names)
+    return lo, bisect.bisect_left(names, following(prefix), lo)
+
+
+def following(prefix):
+    """
+    Returns the first string after every string that starts with `prefix`.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def prefix_search(graph, prefix, limit=10):
+    """
+    Returns the indices of up to `limit` people whose name starts
+    with `prefix`, ignoring case, in alphabetical order.
+    """
+    lo, hi = prefix_range(graph, prefix)
+    return [graph.name_order[i] for i in range(lo, min(hi, lo + limit))]
+
+
+def fuzzy_search(graph, query, limit=10, max_distance=2):
+    """
+    Returns up to `limit` (distance, person index) pairs for people whose
+    lowercase name is within `max_distance` edits of the query, closest
+    first, then by number of movies.
+
+    The sorted lowercase names are walked as an implicit trie, extending
+    one Levenshtein row per character and pruning prefixes already more
+    than `max_distance` edits away. Prefixes are expanded closest first,
+    until `limit` names at least as close as any remaining prefix are
+    found or no prefix is within `max_distance`. Ranges of at most
+    LEAVES names are finished name by name instead.
+    """
+    query = query.lower()
+    names = graph.sorted_names
+    order = graph.name_order
+
+    # Matches found so far, and how many there are at each distance
+    matches = []
+    found = [0] * (max_distance + 1)
+
+    def match(position, distance):
+        person = order[position]
+        matches.append((distance, -movie_count(graph, person), person))
+        found[distance] += 1
+
+    row = [min(j, max_distance + 1) for j in range(len(query) + 1)]
+    heap = [(0, 0, 0, len(names), row)]
+    while heap:
+        bound, depth, lo, hi, row = heapq.heappop(heap)
+        if sum(found[:bound + 1]) >= limit:
+            break
+        depth = -depth
+
+        if hi - lo <= LEAVES:
+            for position in range(lo, hi):
+                distance = finish(query, row, depth,
+                                  names[position][depth:], max_distance)
+                if distance is not None:
+                    match(position, distance)
+            continue
+
+        # Names equal to the prefix sort first within its range
+        position = lo
+        while position < hi and len(names[position]) == depth:
+            if row[-1] <= max_distance:
+                match(position, row[-1])
+            position += 1
+
+        # Each distinct next character starts a child range
+        while position < hi:
+            child = names[position][:depth + 1]
+            end = bisect.bisect_left(names, following(child), position, hi)
+            next_row, bound = extend(query, row, child[-1], depth + 1,
+                                     max_distance)
+            if bound <= max_distance:
+                heapq.heappush(heap, (bound, -depth - 1, position, end,
+                                      next_row))
+            position = end
+
+    matches.sort()
+    return [(distance, person) for distance, _, person in matches[:limit]]
+
+
+def extend(query, row, c, depth, max_distance):
+    """
+    Returns the Levenshtein row of the query against a prefix of length
+    `depth` ending in `c`, given the row `row` of the prefix before it,
+    and the smallest value in it.
+
+    Only cells within `max_distance` of the diagonal can be that close,
+    so only those are computed, and every value is capped at one more.
+    """
+    cap = max_distance + 1
+    next_row = [cap] * len(row)
+    if depth < cap:
+        next_row[0] = depth
+    bound = next_row[0]
+    for j in range(max(1, depth - max_distance),
+                   min(len(row), depth + cap)):
+        value = row[j - 1] if query[j - 1] == c else row[j - 1] + 1
+        if row[j] + 1 < value:
+            value = row[j] + 1
+        if next_row[j - 1] + 1 < value:
+            value = next_row[j - 1] + 1
+        if value > cap:
+            value = cap
+        next_row[j] = value
+        if value < bound:
+            bound = value
+    return next_row, bound
+
+
+def finish(query, row, depth, rest, max_distance):
+    """
+    Returns the edit distance between the query and a name whose prefix
+    of length `depth` has Levenshtein row `row` and which goes on with
+    `rest`, or None if it is more than `max_distance`.
+    """
+    for depth, c in enumerate(rest, depth + 1):
+        row, bound = extend(query, row, c, depth, max_distance)
+        if bound > max_distance:
+            return None
+    return row[-1] if row[-1] <= max_distance else None
+
+
+def movie_count(graph, person):
+    return graph.person_offsets[person + 1] - graph.person_offsets[person]
+
+
+def describe(graph, person):
+    """
+    Returns a dictionary of id, name, birth and movie count for a person.
+    """
+    return {
+        "id": graph.person_ids[person],
+        "name": graph.person_names[person],
+        "birth": graph.person_births[person],
+        "movies": movie_count(graph, person)
+    }
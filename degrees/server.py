@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+import functools
+import json
+import sys
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import degrees
+
+# Answers shortest_path queries; replaced by an LRU-cached wrapper at startup
+cached_path = None
+
+# Request counters reported by /metrics
+metrics = {"requests": 0, "errors": 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve degrees of separation queries over HTTP."
+    )
+    parser.add_argument("directory", nargs="?", default="large",
+                        help="dataset directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--cache-size", type=int, default=4096,
+                        help="number of (source, target) paths to keep")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    configure(args.cache_size)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+def configure(cache_size):
+    """
+    Set up the LRU cache of shortest paths keyed by (source, target).
+    """
+    global cached_path
+    cached_path = functools.lru_cache(maxsize=cache_size)(find_path)
+
+
+def find_path(source, target):
+    path = degrees.shortest_path(source, target, bidirectional=True)
+    return None if path is None else tuple(path)
+
+
+async def serve(host, port):
+    server = await asyncio.start_server(handle, host, port)
+    print(f"Serving on http://{host}:{port}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+async def handle(reader, writer):
+    """
+    Answer HTTP/1.1 GET requests on one connection until it closes.
+    """
+    try:
+        while True:
+            request = await reader.readline()
+            if not request:
+                break
+            keep_alive = True
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = header.decode("latin-1").partition(":")
+                if (name.strip().lower() == "connection"
+                        and value.strip().lower() == "close"):
+                    keep_alive = False
+
+            status, body = await respond(request.decode("latin-1"))
+            data = json.dumps(body).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                "\r\n".encode("latin-1") + data
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def respond(request):
+    """
+    Returns (status, JSON body) for an HTTP request line.
+    """
+    metrics["requests"] += 1
+    try:
+        method, target, _ = request.split()
+    except ValueError:
+        return error("400 Bad Request", "malformed request")
+    if method != "GET":
+        return error("405 Method Not Allowed", "only GET is supported")
+
+    url = urlsplit(target)
+    query = {key: values[0] for key, values in parse_qs(url.query).items()}
+    loop = asyncio.get_running_loop()
+
+    if url.path == "/path":
+        source, target = query.get("source"), query.get("target")
+        if source not in degrees.people or target not in degrees.people:
+            return error("404 Not Found", "person not found")
+        start = time.perf_counter()
+        path = await loop.run_in_executor(None, cached_path, source, target)
+        return "200 OK", {
+            "source": source,
+            "target": target,
+            "degrees": None if path is None else len(path),
+            "path": path,
+            "seconds": time.perf_counter() - start
+        }
+
+    if url.path == "/person":
+        name = query.get("name")
+        if name is None:
+            return error("400 Bad Request", "missing name")
+        return "200 OK", {
+            "name": name,
+            "people": degrees.person_candidates(name)
+        }
+
+    if url.path == "/search":
+        text = query.get("q")
+        if text is None:
+            return error("400 Bad Request", "missing q")
+        try:
+            limit = int(query.get("limit", 10))
+        except ValueError:
+            return error("400 Bad Request", "malformed limit")
+        prefix = query.get("mode") == "prefix"
+        return "200 OK", {
+            "q": text,
+            "people": degrees.search_people(text, limit, prefix)
+        }
+
+    if url.path == "/metrics":
+        info = cached_path.cache_info()
+        lookups = info.hits + info.misses
+        return "200 OK", dict(metrics, cache={
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_rate": info.hits / lookups if lookups else 0.0,
+            "size": info.currsize,
+            "max_size": info.maxsize
+        })
+
+    return error("404 Not Found", "unknown endpoint")
+
+
+def error(status, message):
+    metrics["errors"] += 1
+    return status, {"error": message}
+
+
+if __name__ == "__main__":
+    main()
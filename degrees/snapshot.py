@@ -0,0 +1,230 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+
+from graph import INDEX, Graph
+
+# File layout: fixed preamble, JSON header, then 8-byte aligned sections
+MAGIC = b"DEGRSNAP"
+VERSION = 2
+PREAMBLE = struct.Struct("<8sII")
+ALIGN = 8
+
+FILENAME = "degrees.snapshot"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Graph attributes stored as integer arrays
+ARRAYS = [
+    "person_offsets", "person_movies",
+    "movie_offsets", "movie_stars",
+    "person_order", "movie_order", "name_order"
+]
+
+# Graph attributes stored as string tables
+STRINGS = [
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years", "sorted_names"
+]
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python snapshot.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+
+    print("Loading data...")
+    start = time.perf_counter()
+    graph = Graph()
+    graph.load(directory)
+    print(f"Data loaded in {time.perf_counter() - start:.3f} s.")
+
+    path = compile_data(directory, graph)
+    print(f"Snapshot written to {path}.")
+
+
+class StringTable():
+    """
+    Sequence of strings decoded lazily from a UTF-8 blob,
+    where string `i` is `blob[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def compile_data(directory, graph):
+    """
+    Write `graph`, loaded from the CSV files in `directory`,
+    to a snapshot file next to them. Returns the snapshot path.
+    """
+    sections = []
+    for name in ARRAYS:
+        sections.append((name, as_array(getattr(graph, name)).tobytes()))
+    for name in STRINGS:
+        offsets, blob = encode_strings(getattr(graph, name))
+        sections.append((f"{name}.offsets", offsets.tobytes()))
+        sections.append((f"{name}.blob", blob))
+
+    # Section offsets are relative to the end of the header
+    layout = {}
+    position = 0
+    for name, data in sections:
+        layout[name] = [position, len(data)]
+        position = aligned(position + len(data))
+
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "sources": fingerprints(directory),
+        "sections": layout
+    }).encode("utf-8")
+    header += b" " * (aligned(PREAMBLE.size + len(header)) -
+                      PREAMBLE.size - len(header))
+
+    path = snapshot_path(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        for name, data in sections:
+            f.write(data)
+            f.write(bytes(aligned(len(data)) - len(data)))
+    os.replace(temporary, path)
+    return path
+
+
+def load(directory, graph):
+    """
+    Memory-map the snapshot in `directory` into `graph`.
+    Returns False, leaving `graph` untouched, if there is no snapshot
+    or it is out of date with the CSV files it was compiled from.
+    """
+    try:
+        f = open(snapshot_path(directory), "rb")
+    except FileNotFoundError:
+        return False
+    with f:
+        if os.fstat(f.fileno()).st_size < PREAMBLE.size:
+            return False
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, length = PREAMBLE.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        return False
+    header = json.loads(bytes(data[PREAMBLE.size:PREAMBLE.size + length]))
+    if header["byteorder"] != sys.byteorder:
+        return False
+    if not up_to_date(directory, header["sources"]):
+        return False
+
+    view = memoryview(data)
+    base = PREAMBLE.size + length
+
+    def section(name):
+        start, size = header["sections"][name]
+        return view[base + start:base + start + size]
+
+    for name in ARRAYS:
+        setattr(graph, name, section(name).cast(INDEX))
+    for name in STRINGS:
+        offsets = section(f"{name}.offsets").cast("q")
+        setattr(graph, name, StringTable(offsets, section(f"{name}.blob")))
+    return True
+
+
+def fingerprints(directory):
+    """
+    Returns size, modification time and SHA-256 digest
+    of each source CSV file in `directory`.
+    """
+    sources = {}
+    for filename in SOURCES:
+        path = os.path.join(directory, filename)
+        stat = os.stat(path)
+        sources[filename] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest(path)
+        }
+    return sources
+
+
+def up_to_date(directory, sources):
+    """
+    Checks that the source CSV files still match their fingerprints.
+    Files whose size and mtime are unchanged are trusted without hashing.
+    """
+    for filename in SOURCES:
+        path = os.path.join(directory, filename)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        expected = sources.get(filename)
+        if expected is None or stat.st_size != expected["size"]:
+            return False
+        if stat.st_mtime_ns != expected["mtime_ns"] and (
+            digest(path) != expected["sha256"]
+        ):
+            return False
+    return True
+
+
+def digest(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def encode_strings(strings):
+    """
+    Returns (offsets, blob) encoding a sequence of strings as UTF-8.
+    """
+    offsets = array("q", [0])
+    chunks = []
+    position = 0
+    for string in strings:
+        chunk = string.encode("utf-8")
+        chunks.append(chunk)
+        position += len(chunk)
+        offsets.append(position)
+    return offsets, b"".join(chunks)
+
+
+def as_array(values):
+    if isinstance(values, array):
+        return values
+    return array(INDEX, values)
+
+
+def aligned(size):
+    return (size + ALIGN - 1) // ALIGN * ALIGN
+
+
+if __name__ == "__main__":
+    main()
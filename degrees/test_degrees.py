@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from array import array
+
+import nameindex
+from graph import INDEX, Graph
+
+
+def graph_of(names):
+    """Returns a graph of people with `names` and no movies."""
+    graph = Graph()
+    graph.build([str(i) for i in range(len(names))], names,
+                [""] * len(names), [], [], [], array(INDEX), array(INDEX))
+    return graph
+
+
+class TestNameIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.names = ["Kevin Bacon", "Tom Cruise", "Cary Elwes", "Tom Hanks",
+                      "Mandy Patinkin", "Dustin Hoffman", "Chris Sarandon",
+                      "Demi Moore", "Jack Nicholson", "Bill Paxton",
+                      "Sally Field", "Valeria Golino", "Gerald R. Molen",
+                      "Gary Sinise", "Robin Wright", "Emma Watson"]
+        self.graph = graph_of(self.names)
+
+    def search(self, query, **kwargs):
+        return [(distance, self.names[person]) for distance, person
+                in nameindex.fuzzy_search(self.graph, query, **kwargs)]
+
+    def test_prefix_search(self):
+        people = nameindex.prefix_search(self.graph, "tom")
+        self.assertEqual([self.names[p] for p in people],
+                         ["Tom Cruise", "Tom Hanks"])
+        self.assertEqual(nameindex.prefix_search(self.graph, "zz"), [])
+
+    def test_fuzzy_search_exact(self):
+        self.assertEqual(self.search("tom hanks", limit=1),
+                         [(0, "Tom Hanks")])
+
+    def test_fuzzy_search_first_character(self):
+        self.assertEqual(self.search("Bevin Bacon", limit=1),
+                         [(1, "Kevin Bacon")])
+        self.assertEqual(self.search("xary elwes", limit=1),
+                         [(1, "Cary Elwes")])
+
+    def test_fuzzy_search_order(self):
+        self.names = ["Annie", "Anne", "Ann", "Bob"]
+        self.graph = graph_of(self.names)
+        self.assertEqual(self.search("ann"),
+                         [(0, "Ann"), (1, "Anne"), (2, "Annie")])
+        self.assertEqual(self.search("ann", limit=2),
+                         [(0, "Ann"), (1, "Anne")])
+
+    def test_fuzzy_search_max_distance(self):
+        self.assertEqual(self.search("kevn bacn", max_distance=1), [])
+        self.assertEqual(self.search("kevn bacn"), [(2, "Kevin Bacon")])
+
+
+class TestLoad(unittest.TestCase):
+
+    def load(self, people, movies, stars):
+        """Returns a graph loaded from CSV files with these contents."""
+        with tempfile.TemporaryDirectory() as directory:
+            for filename, text in [("people.csv", people),
+                                   ("movies.csv", movies),
+                                   ("stars.csv", stars)]:
+                with open(os.path.join(directory, filename), "w",
+                          encoding="utf-8", newline="") as f:
+                    f.write(text)
+            graph = Graph()
+            graph.load(directory)
+        return graph
+
+    def test_blank_lines(self):
+        graph = self.load(
+            "id,name,birth\r\n102,Kevin Bacon,1958\r\n\r\n"
+            "158,Tom Hanks,1956\r\n\r\n",
+            "id,title,year\r\n\r\n112384,Apollo 13,1995\r\n",
+            "person_id,movie_id\r\n102,112384\r\n\r\n158,112384\r\n"
+        )
+        self.assertEqual(list(graph.person_names),
+                         ["Kevin Bacon", "Tom Hanks"])
+        self.assertEqual(list(graph.movie_titles), ["Apollo 13"])
+        bacon, hanks = graph.person_index("102"), graph.person_index("158")
+        self.assertEqual(graph.neighbors(bacon), {(0, bacon), (0, hanks)})
+
+    def test_short_rows(self):
+        graph = self.load(
+            "id,name,birth\r\n102,Kevin Bacon\r\n",
+            "id,title,year\r\n",
+            "person_id,movie_id\r\n"
+        )
+        self.assertEqual(list(graph.person_names), ["Kevin Bacon"])
+        self.assertEqual(list(graph.person_births), [None])
+
+
+if __name__ == "__main__":
+    unittest.main()
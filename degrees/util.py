@@ -1,3 +1,6 @@
+from collections import Counter, deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -36,3 +39,46 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class IndexedStackFrontier():
+    """
+    Stack frontier backed by a deque, with a hashed index of the
+    person ids it holds so `contains_state` is O(1).
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        self.people = Counter()
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.people[node.state[1]] += 1
+
+    def contains_state(self, state):
+        return state[1] in self.people
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            return self.forget(self.frontier.pop())
+
+    def forget(self, node):
+        person = node.state[1]
+        self.people[person] -= 1
+        if not self.people[person]:
+            del self.people[person]
+        return node
+
+
+class IndexedQueueFrontier(IndexedStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            return self.forget(self.frontier.popleft())
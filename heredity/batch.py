@@ -0,0 +1,231 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import heredity
+import inference
+import sampling
+
+# Columns of CSV output, one row per person or per failed family
+FIELDS = ["family", "person", "gene_2", "gene_1", "gene_0", "trait",
+          "seconds", "error"]
+
+# Lookup tables shared by every family a worker processes
+tables = None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute gene and trait distributions for many families."
+    )
+    parser.add_argument("source",
+                        help="directory of family CSV files, or a manifest "
+                             "listing one family CSV file per line")
+    parser.add_argument("-o", "--output",
+                        help="JSONL or, if it ends in .csv, CSV file to write "
+                             "(default: JSONL to standard output)")
+    parser.add_argument("-w", "--workers", type=int,
+                        default=multiprocessing.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--method", choices=sorted(METHODS), default="exact")
+    parser.add_argument("--samples", type=int, default=sampling.SAMPLES,
+                        help="sample budget of the sampling methods")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    families = find_families(args.source)
+    options = {"samples": args.samples, "seed": args.seed}
+
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    writer = CSVWriter(output) if (
+        args.output and args.output.endswith(".csv")
+    ) else JSONWriter(output)
+    start = time.perf_counter()
+    try:
+        count, failures = run(families, writer, args.method, options,
+                              args.workers)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    seconds = time.perf_counter() - start
+
+    rate = count / seconds if seconds else float("inf")
+    print(f"{count} families, {failures} failed, in {seconds:.3f} s "
+          f"({rate:.1f} families/sec)", file=sys.stderr)
+
+
+def find_families(source):
+    """
+    Returns the paths of the family CSV files under a directory, or
+    listed in a manifest file, one per line, relative to the manifest.
+    Blank lines and lines starting with # are skipped.
+    """
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(root, filename)
+            for root, _, filenames in os.walk(source)
+            for filename in filenames
+            if filename.endswith(".csv")
+        )
+
+    directory = os.path.dirname(source)
+    with open(source, encoding="utf-8") as f:
+        return [
+            os.path.join(directory, line.strip())
+            for line in f
+            if line.strip() and not line.startswith("#")
+        ]
+
+
+def run(families, writer, method, options, workers):
+    """
+    Process every family, writing each result as it completes.
+    Returns (families processed, families that failed).
+    """
+    shared = heredity.probability_tables()
+    tasks = [(path, method, options) for path in families]
+    count = failures = 0
+
+    if workers == 1:
+        initialize(shared)
+        results = map(process, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers, initializer=initialize,
+                                    initargs=(shared,))
+        results = pool.imap_unordered(process, tasks,
+                                      chunksize=max(1, len(tasks) // 256))
+
+    try:
+        for result in results:
+            writer.write(result)
+            count += 1
+            failures += "error" in result
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return count, failures
+
+
+def initialize(shared):
+    """
+    Keep the lookup tables computed by the parent, along with their
+    logarithms, for every family this process goes on to handle.
+    """
+    global tables
+    tables = {"probabilities": shared, "logs": heredity.log_tables(shared)}
+
+
+def process(task):
+    """
+    Returns the distributions of one family as a result to write, or
+    the error that stopped it, so one bad family cannot stop the batch.
+    """
+    path, method, options = task
+    start = time.perf_counter()
+    try:
+        people = heredity.load_data(path)
+        check(people)
+        result = METHODS[method](people, options)
+    except Exception as e:
+        return {"family": path, "error": f"{type(e).__name__}: {e}",
+                "seconds": time.perf_counter() - start}
+    return dict(family=path, seconds=time.perf_counter() - start, **result)
+
+
+def check(people):
+    """
+    Raises ValueError unless the family has anyone in it, and everyone
+    has both parents in the family, or neither.
+    """
+    if not people:
+        raise ValueError("no people listed")
+    for person in people:
+        mother, father = people[person]["mother"], people[person]["father"]
+        if (mother is None) != (father is None):
+            raise ValueError(f"{person} has only one parent")
+        for parent in (mother, father):
+            if parent is not None and parent not in people:
+                raise ValueError(f"{person}'s parent {parent} is not listed")
+
+
+def exact(people, options):
+    return {"people": inference.marginals(people, tables["probabilities"])}
+
+
+def vectorized(people, options):
+    return {"people": heredity.enumerate_vectorized(
+        people, tables=tables["logs"]
+    )}
+
+
+def estimator(function):
+    """
+    Returns a method running a sampling.METHODS estimator, keeping its
+    standard errors alongside the distributions.
+    """
+    def method(people, options):
+        probabilities, errors = function(
+            people, options["samples"], options["seed"],
+            tables=tables["probabilities"]
+        )
+        return {"people": probabilities, "errors": errors}
+    return method
+
+
+METHODS = {
+    "exact": exact,
+    "vectorized": vectorized,
+    "weighting": estimator(sampling.likelihood_weighting),
+    "gibbs": estimator(sampling.gibbs)
+}
+
+
+class JSONWriter():
+    """
+    Writes one JSON line per family.
+    """
+
+    def __init__(self, output):
+        self.output = output
+
+    def write(self, result):
+        self.output.write(json.dumps(result) + "\n")
+
+
+class CSVWriter():
+    """
+    Writes one CSV row per person, or one per family that failed.
+    """
+
+    def __init__(self, output):
+        self.writer = csv.DictWriter(output, FIELDS)
+        self.writer.writeheader()
+
+    def write(self, result):
+        if "error" in result:
+            self.writer.writerow({
+                "family": result["family"],
+                "seconds": f"{result['seconds']:.6f}",
+                "error": result["error"]
+            })
+            return
+        for person, distribution in result["people"].items():
+            self.writer.writerow({
+                "family": result["family"],
+                "person": person,
+                "gene_2": distribution["gene"][2],
+                "gene_1": distribution["gene"][1],
+                "gene_0": distribution["gene"][0],
+                "trait": distribution["trait"][True],
+                "seconds": f"{result['seconds']:.6f}"
+            })
+
+
+if __name__ == "__main__":
+    main()
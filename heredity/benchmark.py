@@ -0,0 +1,202 @@
+import random
+import sys
+import time
+import tracemalloc
+
+import heredity
+import inference
+import sampling
+
+SIZES = [100, 300, 1000]
+
+# Family sizes small enough to enumerate
+ENUMERATED = [6, 7, 8]
+
+# Sample budgets compared against exact inference
+BUDGETS = [1000, 10000, 100000]
+
+
+def main():
+    if len(sys.argv) > 1:
+        sys.exit("Usage: python benchmark.py")
+
+    print("Bundled families")
+    for i in range(3):
+        benchmark_family(f"data/family{i}.csv")
+
+    print("Generated families, enumerated")
+    for n in ENUMERATED:
+        benchmark_enumeration(generate(n, seed=1))
+
+    print("Peak memory of enumeration")
+    for n in ENUMERATED:
+        benchmark_memory(generate(n, seed=1))
+
+    print("Generated families")
+    for n in SIZES:
+        people = generate(n)
+        start = time.perf_counter()
+        inference.marginals(people)
+        print(f"  {n:>5} people {time.perf_counter() - start:9.3f} s")
+
+    print("Sampling")
+    for i in range(3):
+        filename = f"data/family{i}.csv"
+        benchmark_sampling(filename, heredity.load_data(filename))
+    benchmark_sampling(f"{SIZES[1]} generated people", generate(SIZES[1]))
+
+
+def benchmark_family(filename):
+    """
+    Time enumeration against exact inference on a family from a CSV file,
+    and report the largest difference between their probabilities.
+    """
+    people = heredity.load_data(filename)
+    print(f"  {filename}")
+
+    start = time.perf_counter()
+    expected = heredity.enumerate_probabilities(people)
+    report("enumeration", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    probabilities = heredity.enumerate_vectorized(people)
+    report("vectorized", time.perf_counter() - start)
+    print(f"      largest difference: {difference(probabilities, expected):.1e}")
+
+    start = time.perf_counter()
+    probabilities = inference.marginals(people)
+    report("inference", time.perf_counter() - start)
+    print(f"      largest difference: {difference(probabilities, expected):.1e}")
+
+
+def benchmark_enumeration(people):
+    """
+    Time enumeration one assignment at a time against vectorized
+    enumeration on a generated family.
+    """
+    print(f"  {len(people)} people")
+    start = time.perf_counter()
+    expected = heredity.enumerate_probabilities(people)
+    report("enumeration", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    probabilities = heredity.enumerate_vectorized(people)
+    report("vectorized", time.perf_counter() - start)
+    print(f"      largest difference: {difference(probabilities, expected):.1e}")
+
+    for workers in [1, None]:
+        start = time.perf_counter()
+        probabilities = heredity.enumerate_lazily(people, workers)
+        report("lazy" if workers == 1 else "lazy, pool",
+               time.perf_counter() - start)
+        print(f"      largest difference: "
+              f"{difference(probabilities, expected):.1e}")
+
+
+def benchmark_memory(people):
+    """
+    Compare peak memory of enumeration with and without building
+    sets of people, in one process.
+    """
+    print(f"  {len(people)} people")
+    for label, enumerate_family in [
+        ("enumeration", heredity.enumerate_probabilities),
+        ("lazy", lambda people: heredity.enumerate_lazily(people, 1))
+    ]:
+        tracemalloc.start()
+        enumerate_family(people)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"    {label:<12} {peak / 1024:9.1f} KiB")
+
+
+def benchmark_sampling(label, people):
+    """
+    Compare each sampling method's estimates against exact inference
+    on a family at every sample budget, with the largest standard error
+    it reports and how many estimates fall within three of them.
+    """
+    print(f"  {label}")
+    expected = inference.marginals(people)
+    for method in sampling.METHODS:
+        for samples in BUDGETS:
+            start = time.perf_counter()
+            probabilities, errors = sampling.METHODS[method](
+                people, samples, seed=0
+            )
+            seconds = time.perf_counter() - start
+            within = [
+                abs(probabilities[person][field][value] - p)
+                <= 3 * errors[person][field][value] + 1e-12
+                for person in expected
+                for field in expected[person]
+                for value, p in expected[person][field].items()
+            ]
+            print(f"    {method:<10} {samples:>7} samples {seconds:7.3f} s  "
+                  f"error {difference(probabilities, expected):.4f}  "
+                  f"largest SE {largest(errors):.4f}  "
+                  f"within 3 SE {sum(within) / len(within):.0%}")
+
+
+def largest(errors):
+    return max(
+        error for person in errors for field in errors[person]
+        for error in errors[person][field].values()
+    )
+
+
+def difference(probabilities, expected):
+    """
+    Returns the largest difference between two sets of distributions.
+    """
+    return max(
+        abs(probabilities[person][field][value] - p)
+        for person in expected
+        for field in expected[person]
+        for value, p in expected[person][field].items()
+    )
+
+
+def report(label, seconds):
+    print(f"    {label:<12} {seconds:9.3f} s")
+
+
+def generate(n, seed=0, observed=0.5, cousins=0.05):
+    """
+    Returns a random family of `n` people in the format of load_data.
+
+    The family grows from one couple: each new couple is someone without
+    a partner and, usually, a newcomer marrying in, though a fraction
+    `cousins` of couples are two relatives. Each couple has one to four
+    children. A fraction `observed` of people have a known trait.
+    """
+    rng = random.Random(seed)
+    people = {}
+
+    def add(mother=None, father=None):
+        name = f"Person{len(people)}"
+        people[name] = {
+            "name": name,
+            "mother": mother,
+            "father": father,
+            "trait": (rng.random() < 0.1 if rng.random() < observed
+                      else None)
+        }
+        return name
+
+    single = [add(), add()]
+    while len(people) < n:
+        first = single.pop(rng.randrange(len(single)))
+        if rng.random() < cousins and single:
+            second = single.pop(rng.randrange(len(single)))
+        else:
+            second = add()
+        for _ in range(min(rng.randint(1, 4), n - len(people))):
+            single.append(add(first, second))
+        if not single:
+            single.append(add())
+    return people
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 import csv
 import itertools
+import multiprocessing
 import sys
 
+import numpy as np
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -36,14 +39,55 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Assignments evaluated at once by vectorized enumeration
+BATCH = 1 << 16
+
+# Partitions of the assignment space per worker for lazy enumeration
+PARTITIONS = 4
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
+    args = sys.argv[1:]
+    methods = [flag for flag in ["--vectorized", "--lazy"] if flag in args]
+    args = [arg for arg in args if arg not in methods]
+    if len(args) != 1 or len(methods) > 1:
+        sys.exit("Usage: python heredity.py [--vectorized | --lazy] data.csv")
+    method = methods[0] if methods else None
+    people = load_data(args[0])
+
+    # Sum every assignment consistent with the known traits
+    if method == "--vectorized":
+        probabilities = enumerate_vectorized(people)
+    elif method == "--lazy":
+        probabilities = enumerate_lazily(people)
+    else:
+        probabilities = enumerate_probabilities(people)
+
+    # Print results
+    print_probabilities(people, probabilities)
 
+
+def print_probabilities(people, probabilities):
+    """
+    Print the gene and trait distribution of each person.
+    """
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def enumerate_probabilities(people):
+    """
+    Return the gene and trait distribution of each person, given the
+    traits that are known, by summing the joint probability of every
+    assignment of genes and traits consistent with them.
+    """
     # Keep track of gene and trait probabilities for each person
     probabilities = {
         person: {
@@ -83,15 +127,266 @@ def main():
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
+    return probabilities
+
+
+def enumerate_lazily(people, workers=None):
+    """
+    Return the same distributions as `enumerate_probabilities`, streaming
+    assignments depth first instead of building sets of people, with
+    partitions of them spread over `workers` processes (all CPUs by
+    default, none if 1).
+
+    People are assigned parents first, so the joint probability is built
+    up one person at a time, and a branch is dropped as soon as it has
+    probability zero. Known traits are never branched on. Only the
+    current assignment is held, so memory does not grow with the family.
+    """
+    order = parents_first(people)
+
+    # Partition by the gene counts of the first few people
+    workers = workers or multiprocessing.cpu_count()
+    depth = 0
+    while depth < len(order) and 3 ** depth < PARTITIONS * workers:
+        depth += 1
+    tasks = [
+        (people, order, prefix)
+        for prefix in itertools.product(range(3), repeat=depth)
+    ]
+
+    if workers == 1:
+        results = map(enumerate_partition, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap_unordered(enumerate_partition, tasks)
+
+    probabilities = {
+        person: {"gene": {2: 0, 1: 0, 0: 0}, "trait": {True: 0, False: 0}}
+        for person in people
+    }
+    try:
+        for totals in results:
+            for person in people:
+                for field in totals[person]:
+                    for value, p in totals[person][field].items():
+                        probabilities[person][field][value] += p
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    normalize(probabilities)
+    return probabilities
+
+
+def enumerate_partition(task):
+    """
+    Return unnormalized gene and trait totals for each person over the
+    assignments where the first people of `order` have the gene counts
+    in `prefix`.
+    """
+    people, order, prefix = task
+    totals = {
+        person: {"gene": {2: 0, 1: 0, 0: 0}, "trait": {True: 0, False: 0}}
+        for person in people
+    }
+    for genes, traits, p in assignments(people, order, prefix):
+        for person in order:
+            totals[person]["gene"][genes[person]] += p
+            totals[person]["trait"][traits[person]] += p
+    return totals
+
+
+def assignments(people, order, prefix=(), genes=None, traits=None, p=1):
+    """
+    Yield (genes, traits, p) for every assignment of gene counts and
+    traits to `order` consistent with known traits and with nonzero
+    joint probability p, where the first people of `order` have the gene
+    counts in `prefix`. The dictionaries yielded are reused between
+    assignments.
+    """
+    genes = {} if genes is None else genes
+    traits = {} if traits is None else traits
+    if len(genes) == len(order):
+        yield genes, traits, p
+        return
+
+    person = order[len(genes)]
+    mother, father = people[person]["mother"], people[person]["father"]
+    if len(genes) < len(prefix):
+        counts = [prefix[len(genes)]]
+    else:
+        counts = [2, 1, 0]
+    known = people[person]["trait"]
+    for count in counts:
+        if mother is None:
+            p_gene = PROBS["gene"][count]
+        else:
+            from_mother = heredity_probs(genes[mother])
+            from_father = heredity_probs(genes[father])
+            p_gene = {
+                2: from_mother["yes"] * from_father["yes"],
+                1: from_mother["yes"] * from_father["no"]
+                + from_mother["no"] * from_father["yes"],
+                0: from_mother["no"] * from_father["no"]
+            }[count]
+        for trait in [True, False] if known is None else [known]:
+            p_person = p_gene * PROBS["trait"][count][trait]
+            if p * p_person == 0:
+                continue
+            genes[person] = count
+            traits[person] = trait
+            yield from assignments(people, order, prefix, genes, traits,
+                                   p * p_person)
+            del genes[person], traits[person]
+
+
+def parents_first(people):
+    """
+    Return the names of `people` ordered so that everyone comes after
+    their parents.
+    """
+    order = []
+    placed = set()
+
+    def place(person):
+        if person in placed:
+            return
+        for parent in (people[person]["mother"], people[person]["father"]):
+            if parent is not None:
+                place(parent)
+        placed.add(person)
+        order.append(person)
 
-    # Print results
     for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+        place(person)
+    return order
+
+
+def enumerate_vectorized(people, batch=BATCH, tables=None):
+    """
+    Return the same distributions as `enumerate_probabilities`, evaluating
+    `batch` assignments at a time as NumPy arrays, with the lookup tables
+    of `log_tables` or `tables` if given.
+
+    Assignments are numbered so that each person's gene count is one
+    base-3 digit, followed by one bit for each person whose trait is
+    not known; known traits are fixed rather than filtered out.
+    """
+    family = encode(people)
+    if tables is None:
+        tables = log_tables()
+    n = len(family["names"])
+    unknown = np.flatnonzero(family["traits"] < 0)
+    total = 3 ** n * 2 ** len(unknown)
+
+    gene_totals = np.zeros((n, 3))
+    trait_totals = np.zeros((n, 2))
+    for start in range(0, total, batch):
+        index = np.arange(start, min(start + batch, total), dtype=np.int64)
+        genes = (index[:, None] // 3 ** np.arange(n)) % 3
+        traits = np.broadcast_to(family["traits"], genes.shape).copy()
+        traits[:, unknown] = (
+            index[:, None] // 3 ** n >> np.arange(len(unknown))
+        ) & 1
+        p = joint_probabilities(family, genes, traits, tables)
+        update_batch(gene_totals, trait_totals, genes, traits, p)
+
+    probabilities = {
+        name: {
+            "gene": {count: gene_totals[i, count] for count in (2, 1, 0)},
+            "trait": {True: trait_totals[i, 1], False: trait_totals[i, 0]}
+        }
+        for i, name in enumerate(family["names"])
+    }
+    normalize(probabilities)
+    return probabilities
+
+
+def encode(people):
+    """
+    Return the family as arrays over people in the order of `people`:
+    the index of each person's mother and father (-1 if not listed)
+    and their trait (1 or 0 if known, -1 if not).
+    """
+    names = list(people)
+    index = {name: i for i, name in enumerate(names)}
+    return {
+        "names": names,
+        "mothers": np.array([index.get(people[name]["mother"], -1)
+                             for name in names], dtype=np.intp),
+        "fathers": np.array([index.get(people[name]["father"], -1)
+                             for name in names], dtype=np.intp),
+        "traits": np.array([-1 if people[name]["trait"] is None
+                            else int(people[name]["trait"])
+                            for name in names], dtype=np.intp)
+    }
+
+
+def probability_tables():
+    """
+    Return lookup tables of probabilities: "gene"[g] of g copies of the
+    gene for a person without parents, "inherit"[g, mother, father] of
+    g copies given the parents' copies, and "trait"[g, t] of trait t
+    (1 or 0) given g copies.
+    """
+    inherit = np.empty((3, 3, 3))
+    for mother, father in itertools.product(range(3), repeat=2):
+        from_mother = heredity_probs(mother)
+        from_father = heredity_probs(father)
+        inherit[:, mother, father] = [
+            from_mother["no"] * from_father["no"],
+            from_mother["yes"] * from_father["no"]
+            + from_mother["no"] * from_father["yes"],
+            from_mother["yes"] * from_father["yes"]
+        ]
+    return {
+        "gene": np.array([PROBS["gene"][g] for g in range(3)]),
+        "inherit": inherit,
+        "trait": np.array([[PROBS["trait"][g][False], PROBS["trait"][g][True]]
+                           for g in range(3)])
+    }
+
+
+def log_tables(tables=None):
+    """
+    Return the lookup tables of `probability_tables`, or of `tables`
+    if given, as log probabilities.
+    """
+    if tables is None:
+        tables = probability_tables()
+    return {name: np.log(table) for name, table in tables.items()}
+
+
+def joint_probabilities(family, genes, traits, tables):
+    """
+    Return the joint probability of each row of `genes` and `traits`,
+    arrays of gene counts and traits (1 or 0) with one column per person
+    of `family`, as `joint_probability` computes for one assignment.
+    """
+    founders = family["mothers"] < 0
+    children = ~founders
+    log_p = tables["gene"][genes[:, founders]].sum(axis=1)
+    log_p += tables["inherit"][
+        genes[:, children],
+        genes[:, family["mothers"][children]],
+        genes[:, family["fathers"][children]]
+    ].sum(axis=1)
+    log_p += tables["trait"][genes, traits].sum(axis=1)
+    return np.exp(log_p)
+
+
+def update_batch(gene_totals, trait_totals, genes, traits, p):
+    """
+    Add joint probabilities `p` of a batch of assignments to each
+    person's row of `gene_totals` and `trait_totals`, as `update`
+    does for one assignment.
+    """
+    for count in range(3):
+        gene_totals[:, count] += p @ (genes == count)
+    for trait in range(2):
+        trait_totals[:, trait] += p @ (traits == trait)
 
 
 def load_data(filename):
@@ -154,9 +449,9 @@ def joint_probability(people, one_gene, two_genes, have_trait):
             temp_children[person]["prob_gens"] = 0
     
     for child in temp_children:
-        mom_gens = temp_parents[people[child]["mother"]]["gens"]
+        mom_gens = gene_count(people[child]["mother"], one_gene, two_genes)
         probs_from_mom = heredity_probs(mom_gens)
-        dad_gens = temp_parents[people[child]["father"]]["gens"]
+        dad_gens = gene_count(people[child]["father"], one_gene, two_genes)
         probs_from_dad = heredity_probs(dad_gens)
         if child in one_gene:
             temp_children[child]["prob_gens"] = (probs_from_dad["yes"] * probs_from_mom["no"]) \
@@ -179,6 +474,17 @@ def joint_probability(people, one_gene, two_genes, have_trait):
     return joint_prob        
 
 
+def gene_count(person, one_gene, two_genes):
+    """
+    Return how many copies of the gene `person` has.
+    """
+    if person in two_genes:
+        return 2
+    if person in one_gene:
+        return 1
+    return 0
+
+
 def heredity_probs(num_gen):
     if num_gen == 1:
         yes = 0.50
@@ -0,0 +1,213 @@
+import itertools
+import sys
+
+import numpy as np
+
+from heredity import load_data, print_probabilities, probability_tables
+
+# Values a gene variable can take, in the order main prints them
+GENES = (2, 1, 0)
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python inference.py data.csv")
+    people = load_data(sys.argv[1])
+
+    # Compute exact gene and trait distributions for each person
+    print_probabilities(people, marginals(people))
+
+
+class Factor():
+    """
+    Table of nonnegative values over the gene counts of `variables`,
+    with one axis per variable indexed by its number of copies.
+    """
+
+    def __init__(self, variables, table):
+        self.variables = tuple(variables)
+        self.table = table
+
+    def expand(self, variables):
+        """
+        Return the table with its axes ordered as in `variables`, a
+        superset of this factor's, and of length 1 for the ones it lacks.
+        """
+        present = [v for v in variables if v in self.variables]
+        table = self.table.transpose(
+            [self.variables.index(v) for v in present]
+        )
+        return table.reshape(
+            [3 if v in self.variables else 1 for v in variables]
+        )
+
+    def multiply(self, other):
+        """
+        Return the product of this factor and `other`.
+        """
+        variables = self.variables + tuple(
+            v for v in other.variables if v not in self.variables
+        )
+        return Factor(variables,
+                      self.expand(variables) * other.expand(variables))
+
+    def marginal(self, variables):
+        """
+        Return this factor summed over all but `variables`, normalized.
+        """
+        variables = tuple(variables)
+        table = self.table.sum(axis=tuple(
+            i for i, v in enumerate(self.variables) if v not in variables
+        ))
+        kept = [v for v in self.variables if v in variables]
+        table = table.transpose([kept.index(v) for v in variables])
+        return Factor(variables, table / table.sum())
+
+
+def marginals(people, tables=None):
+    """
+    Return the gene and trait distribution of each person, given the
+    traits that are known, in the format main prints, with the lookup
+    tables of heredity.probability_tables or `tables` if given.
+
+    The family is a Bayesian network with one gene variable per person,
+    conditioned on their parents' genes, and a known trait entering as
+    the likelihood of that trait given the person's genes. Its junction
+    tree is calibrated by passing messages up and back down, leaving
+    each clique with the joint distribution of its people's genes.
+    Cliques stay small unless many relatives have children together.
+    """
+    if tables is None:
+        tables = probability_tables()
+    beliefs = calibrate(network(people, tables))
+    probabilities = {}
+    for person in people:
+        gene = beliefs[person].marginal([person]).table
+        trait = people[person]["trait"]
+        if trait is None:
+            p = gene @ tables["trait"][:, 1]
+        else:
+            p = 1 if trait else 0
+        probabilities[person] = {
+            "gene": {count: float(gene[count]) for count in GENES},
+            "trait": {True: float(p), False: float(1 - p)}
+        }
+    return probabilities
+
+
+def network(people, tables):
+    """
+    Return one factor per person over their genes and their parents'
+    genes: the probability of their genes given their parents' genes,
+    times the probability of their trait, if known, given their genes.
+    """
+    factors = []
+    for person in people:
+        trait = people[person]["trait"]
+        evidence = np.ones(3)
+        if trait is not None:
+            evidence = tables["trait"][:, int(trait)]
+        mother, father = people[person]["mother"], people[person]["father"]
+        if mother is None:
+            factors.append(Factor([person], tables["gene"] * evidence))
+        else:
+            factors.append(Factor(
+                [person, mother, father],
+                tables["inherit"] * evidence[:, None, None]
+            ))
+    return factors
+
+
+def elimination_order(factors):
+    """
+    Return (order, cliques): an order in which to sum out every variable,
+    choosing each time the one whose elimination adds the fewest edges
+    between its neighbors, and the set of variables that each variable
+    shares a factor with when it is eliminated.
+    """
+    neighbors = {}
+    for factor in factors:
+        for v in factor.variables:
+            neighbors.setdefault(v, set()).update(factor.variables)
+    for v in neighbors:
+        neighbors[v].discard(v)
+
+    def fill(v):
+        return sum(
+            1 for a, b in itertools.combinations(neighbors[v], 2)
+            if b not in neighbors[a]
+        )
+
+    scores = {v: fill(v) for v in neighbors}
+    order, cliques = [], {}
+    while scores:
+        v = min(scores, key=lambda v: (scores[v], len(neighbors[v])))
+        cliques[v] = {v} | neighbors[v]
+        for a, b in itertools.combinations(neighbors[v], 2):
+            neighbors[a].add(b)
+            neighbors[b].add(a)
+        for u in neighbors[v]:
+            neighbors[u].discard(v)
+        order.append(v)
+
+        # Only neighbors and their neighbors can have gained edges
+        affected = set(neighbors[v])
+        for u in neighbors[v]:
+            affected.update(neighbors[u])
+        del neighbors[v], scores[v]
+        for u in affected:
+            scores[u] = fill(u)
+    return order, cliques
+
+
+def calibrate(factors):
+    """
+    Return the calibrated clique beliefs of a junction tree over
+    `factors`, keyed by the variable whose elimination formed each clique.
+
+    Each clique's parent is the clique of the first of its other
+    variables to be eliminated, which holds them all. Messages are
+    normalized as they go, so large families do not underflow.
+    """
+    order, cliques = elimination_order(factors)
+    position = {v: i for i, v in enumerate(order)}
+    parent = {
+        v: min(cliques[v] - {v}, key=position.get, default=None)
+        for v in order
+    }
+
+    # Multiply each factor into the clique of its first variable eliminated
+    potentials = {
+        v: Factor(sorted(cliques[v], key=position.get),
+                  np.ones((3,) * len(cliques[v])))
+        for v in order
+    }
+    for factor in factors:
+        v = min(factor.variables, key=position.get)
+        potentials[v] = potentials[v].multiply(factor)
+
+    # Pass messages from the leaves up, each summing out its own variable
+    upward = {}
+    for v in order:
+        if parent[v] is not None:
+            upward[v] = potentials[v].marginal(potentials[v].variables[1:])
+            potentials[parent[v]] = potentials[parent[v]].multiply(upward[v])
+
+    # Then back down, dividing out what each clique already sent up
+    beliefs = {}
+    for v in reversed(order):
+        beliefs[v] = potentials[v]
+        if parent[v] is not None:
+            above = beliefs[parent[v]].marginal(upward[v].variables)
+            sent = upward[v].table
+            ratio = np.divide(above.table, sent, out=np.zeros_like(sent),
+                              where=sent > 0)
+            beliefs[v] = beliefs[v].multiply(Factor(upward[v].variables, ratio))
+        beliefs[v].table /= beliefs[v].table.sum()
+    return beliefs
+
+
+if __name__ == "__main__":
+    main()
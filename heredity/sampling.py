@@ -0,0 +1,243 @@
+import argparse
+import math
+
+import numpy as np
+
+from heredity import encode, load_data, parents_first, probability_tables
+
+# Default number of samples drawn
+SAMPLES = 100000
+
+# Samples drawn at once by likelihood weighting
+BATCH = 1 << 14
+
+# Independent Gibbs chains advanced together
+CHAINS = 1000
+
+# Sweeps discarded from the start of each Gibbs chain
+BURN_IN = 50
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estimate gene and trait distributions by sampling."
+    )
+    parser.add_argument("data", help="family CSV file")
+    parser.add_argument("--method", choices=sorted(METHODS),
+                        default="weighting")
+    parser.add_argument("--samples", type=int, default=SAMPLES,
+                        help="sample budget")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    people = load_data(args.data)
+    probabilities, errors = METHODS[args.method](
+        people, args.samples, args.seed
+    )
+
+    # Print results with their standard errors
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                error = errors[person][field][value]
+                print(f"    {value}: {p:.4f} ± {error:.4f}")
+
+
+def likelihood_weighting(people, samples=SAMPLES, seed=None, batch=BATCH,
+                         tables=None):
+    """
+    Return (probabilities, standard errors) of each person's gene and
+    trait distribution, estimated from `samples` weighted samples, with
+    the lookup tables of `probability_tables` or `tables` if given.
+
+    Genes are sampled parents first from the model, `batch` samples at
+    a time, and each sample is weighted by the probability of the known
+    traits given its genes. Unknown traits are not sampled: each sample
+    contributes the probability of the trait given its genes instead.
+    """
+    family = encode(people)
+    if tables is None:
+        tables = probability_tables()
+    observed = np.flatnonzero(family["traits"] >= 0)
+    rng = np.random.default_rng(seed)
+
+    # Sums of weights and weighted estimates, for a ratio estimator and
+    # its standard error, kept relative to the largest log weight so far
+    scale = -math.inf
+    total = total_squared = 0
+    weighted = weighted_squared = weighted_squares = 0
+    for start in range(0, samples, batch):
+        size = min(batch, samples - start)
+        genes = forward(people, family, tables, rng, size)
+
+        log_weights = np.log(tables["trait"][
+            genes[:, observed], family["traits"][observed]
+        ]).sum(axis=1)
+        if log_weights.max() > scale:
+            shrink = math.exp(scale - log_weights.max())
+            total, weighted = total * shrink, weighted * shrink
+            total_squared *= shrink ** 2
+            weighted_squared = weighted_squared * shrink ** 2
+            weighted_squares = weighted_squares * shrink ** 2
+            scale = log_weights.max()
+        weights = np.exp(log_weights - scale)
+
+        values = estimates(family, tables, genes)
+        total += weights.sum()
+        total_squared += (weights ** 2).sum()
+        weighted = weighted + np.einsum("s,snk->nk", weights, values)
+        weighted_squared = weighted_squared + np.einsum(
+            "s,snk->nk", weights ** 2, values
+        )
+        weighted_squares = weighted_squares + np.einsum(
+            "s,snk->nk", weights ** 2, values ** 2
+        )
+
+    means = weighted / total
+    variance = (
+        weighted_squares - 2 * means * weighted_squared
+        + means ** 2 * total_squared
+    ) / total ** 2
+    return distributions(family, means, np.sqrt(np.maximum(variance, 0)))
+
+
+def gibbs(people, samples=SAMPLES, seed=None, chains=CHAINS,
+          burn_in=BURN_IN, tables=None):
+    """
+    Return (probabilities, standard errors) of each person's gene and
+    trait distribution, estimated from `samples` Gibbs samples, with the
+    lookup tables of `probability_tables` or `tables` if given.
+
+    `chains` independent chains start from the model and are advanced
+    together, resampling each person's genes given their parents, their
+    known trait and their children, all of whose probabilities are far
+    enough from zero to multiply directly. After `burn_in` sweeps, every sweep
+    counts as one sample per chain. Standard errors come from the spread
+    of the estimates of the chains.
+    """
+    family = encode(people)
+    if tables is None:
+        tables = probability_tables()
+    evidence = np.where(
+        family["traits"][:, None] >= 0,
+        tables["trait"][:, np.maximum(family["traits"], 0)].T,
+        1
+    )
+    n = len(family["names"])
+    rng = np.random.default_rng(seed)
+    chains = min(chains, samples)
+    sweeps = math.ceil(samples / chains)
+
+    # Each person's children, with the other parent and the inheritance
+    # table indexed [person's genes, child's genes, other parent's genes]
+    as_mother = tables["inherit"].transpose(1, 0, 2)
+    as_father = tables["inherit"].transpose(2, 0, 1)
+    children = [[] for _ in range(n)]
+    for child in range(n):
+        mother, father = family["mothers"][child], family["fathers"][child]
+        if mother >= 0:
+            children[mother].append((child, father, as_mother))
+            children[father].append((child, mother, as_father))
+
+    # Genes are laid out one row per person, one column per chain
+    genes = forward(people, family, tables, rng, chains).T.copy()
+    prior = tables["gene"][:, None]
+    sums = np.zeros((chains, n, 4))
+    for sweep in range(burn_in + sweeps):
+        for i in range(n):
+            mother, father = family["mothers"][i], family["fathers"][i]
+            if mother < 0:
+                p = np.repeat(prior * evidence[i][:, None], chains, axis=1)
+            else:
+                p = tables["inherit"][:, genes[mother], genes[father]]
+                p *= evidence[i][:, None]
+            for child, other, table in children[i]:
+                p *= table[:, genes[child], genes[other]]
+
+            # Sample by comparing a uniform draw to the running totals
+            below = p[0] + p[1]
+            u = rng.random(chains) * (below + p[2])
+            genes[i] = (u >= p[0]).astype(np.intp) + (u >= below)
+        if sweep >= burn_in:
+            sums += estimates(family, tables, genes.T)
+
+    per_chain = sums / sweeps
+    means = per_chain.mean(axis=0)
+    errors = np.zeros_like(means)
+    if chains > 1:
+        errors = per_chain.std(axis=0, ddof=1) / math.sqrt(chains)
+    return distributions(family, means, errors)
+
+
+def forward(people, family, tables, rng, size):
+    """
+    Return `size` samples of everyone's gene counts drawn from the
+    model, parents first, ignoring known traits.
+    """
+    index = {name: i for i, name in enumerate(family["names"])}
+    genes = np.empty((size, len(index)), dtype=np.intp)
+    for i in (index[name] for name in parents_first(people)):
+        mother, father = family["mothers"][i], family["fathers"][i]
+        if mother < 0:
+            p = np.broadcast_to(tables["gene"], (size, 3))
+        else:
+            p = tables["inherit"][:, genes[:, mother], genes[:, father]].T
+        genes[:, i] = draw(rng, p)
+    return genes
+
+
+def draw(rng, p):
+    """
+    Return one index sampled from each row of probabilities `p`.
+    """
+    u = rng.random(len(p))
+    return np.minimum((u[:, None] > np.cumsum(p, axis=1)).sum(axis=1),
+                      p.shape[1] - 1)
+
+
+def estimates(family, tables, genes):
+    """
+    Return an array over samples and people of what each sample says of
+    each person: whether they have 0, 1 or 2 copies of the gene, and the
+    probability they have the trait (known, or given their genes).
+    """
+    trait = np.where(family["traits"] >= 0, family["traits"],
+                     tables["trait"][genes, 1])
+    values = np.empty(genes.shape + (4,))
+    for count in range(3):
+        values[:, :, count] = genes == count
+    values[:, :, 3] = trait
+    return values
+
+
+def distributions(family, means, errors):
+    """
+    Return (probabilities, standard errors) in the format main prints,
+    from arrays over people laid out as by `estimates`.
+    """
+    def table(values, complement):
+        return {
+            name: {
+                "gene": {count: float(values[i, count])
+                         for count in (2, 1, 0)},
+                "trait": {True: float(values[i, 3]),
+                          False: float(complement(values[i, 3]))}
+            }
+            for i, name in enumerate(family["names"])
+        }
+
+    return (table(means, lambda p: 1 - p),
+            table(errors, lambda error: error))
+
+
+METHODS = {
+    "weighting": likelihood_weighting,
+    "gibbs": gibbs
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+
+import sat
+from generator import generate
+from logic import *
+
+# Entailment checkers compared
+BACKENDS = {
+    "enumerate": lambda knowledge, query: model_check(knowledge, query),
+    "bitset": lambda knowledge, query: model_check(knowledge, query, "bitset"),
+    "sat": sat.entails
+}
+
+# Checkers of many queries against one knowledge base
+MANY = {
+    "bitset": model_check_many,
+    "sat": sat.entails_many
+}
+
+# Most symbols in the puzzles each backend is timed on
+LIMITS = {"enumerate": 20, "bitset": 28}
+
+SIZES = [4, 6, 8, 10, 12, 14, 50, 100, 200]
+
+# Characters in the puzzles built to measure sentences
+LARGE = [1000, 10000, 30000]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the entailment checkers on generated puzzles."
+    )
+    parser.add_argument("sizes", type=int, nargs="*", default=SIZES,
+                        help="numbers of characters in the puzzles checked")
+    parser.add_argument("--spy", action="store_true",
+                        help="make one character of each puzzle a spy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-sentences", action="store_true",
+                        help="do not measure building large puzzles")
+    parser.add_argument("-o", "--output",
+                        help="JSON file to write every measurement to")
+    args = parser.parse_args()
+
+    results = []
+    options = {"spy": args.spy, "seed": args.seed}
+
+    print("Model checking")
+    benchmark_backends(args.sizes, options, results)
+
+    print("Checking every symbol")
+    benchmark_many(args.sizes, options, results)
+
+    if not args.skip_sentences:
+        print("Building sentences")
+        benchmark_sentences(LARGE, results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "options": options,
+                "results": results
+            }, f, indent=2)
+            f.write("\n")
+
+
+def benchmark_backends(sizes, options, results):
+    """
+    Time each backend on generated puzzles of each size,
+    asking whether the first character is a knight, and whether they
+    have any role, which holds in every model and so leaves no
+    counterexample to stop at early.
+    """
+    for n in sizes:
+        knowledge, characters, _ = generate(n, options["seed"], options["spy"])
+        roles = next(iter(characters.values()))
+        count = len(knowledge.symbols())
+        print(f"  {n:>3} characters {count:>3} symbols")
+
+        for query in [roles["Knight"], Or(*roles.values())]:
+            print(f"    {query.formula()}")
+            answers = set()
+            for backend, entails in BACKENDS.items():
+                if count > LIMITS.get(backend, count):
+                    continue
+                entailed, seconds, peak = measure(entails, knowledge, query)
+                answers.add(entailed)
+                report(backend, seconds, peak)
+                results.append({
+                    "section": "backends", "backend": backend,
+                    "characters": n, "symbols": count,
+                    "query": query.formula(), "entailed": entailed,
+                    "seconds": seconds, "peak_bytes": peak
+                })
+            print(f"      entailed: {', '.join(map(str, answers))}")
+
+
+def benchmark_many(sizes, options, results):
+    """
+    Time asking whether each character has each role, one query at a
+    time and all at once, for each backend that checks many queries.
+    """
+    for n in sizes:
+        knowledge, characters, _ = generate(n, options["seed"], options["spy"])
+        queries = [symbol for roles in characters.values()
+                   for symbol in roles.values()]
+        print(f"  {n:>3} characters {len(queries):>3} queries")
+
+        for backend, entails_many in MANY.items():
+            if len(queries) > LIMITS.get(backend, len(queries)):
+                continue
+            expected, seconds, peak = measure(lambda: [
+                BACKENDS[backend](knowledge, query) for query in queries
+            ])
+            report(backend, seconds, peak)
+            result = {
+                "section": "many", "backend": backend,
+                "characters": n, "symbols": len(queries),
+                "queries": len(queries), "seconds": seconds,
+                "peak_bytes": peak
+            }
+            results.append(result)
+
+            entailed, many_seconds, many_peak = measure(
+                entails_many, knowledge, queries
+            )
+            report(f"{backend} many", many_seconds, many_peak)
+            if entailed != expected:
+                print("      answers differ")
+            result.update(agree=entailed == expected,
+                          many_seconds=many_seconds,
+                          many_peak_bytes=many_peak)
+
+
+def benchmark_sentences(sizes, results, puzzles=10):
+    """
+    Measure the time and memory taken to build a generated puzzle of
+    each size, and `puzzles` puzzles about the same characters, with
+    and without interning, and the time to hash the first and collect
+    its symbols, twice each.
+    """
+    for n in sizes:
+        for count, interning in [(1, False), (puzzles, False),
+                                 (puzzles, True)]:
+            label = " interned" if interning else ""
+            print(f"  {n:>6} characters {count:>3} puzzles{label}")
+
+            def build():
+                if not interning:
+                    return [generate(n, seed)[0] for seed in range(count)]
+                with Sentence.interning():
+                    return [generate(n, seed)[0] for seed in range(count)]
+
+            start = time.perf_counter()
+            knowledge = build()
+            seconds = time.perf_counter() - start
+            report("build", seconds)
+            del knowledge
+
+            tracemalloc.start()
+            knowledge = build()
+            memory, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"      {'memory':<14} {memory / 2 ** 20:>9.1f} MiB")
+
+            result = {
+                "section": "sentences", "characters": n, "puzzles": count,
+                "interning": interning,
+                "seconds": seconds, "memory_bytes": memory,
+                "peak_bytes": peak
+            }
+            for label in ["hash", "symbols"]:
+                for call in ["first", "second"]:
+                    start = time.perf_counter()
+                    if label == "hash":
+                        hash(knowledge[0])
+                    else:
+                        knowledge[0].symbols()
+                    result[f"{label}_{call}_seconds"] = (
+                        time.perf_counter() - start
+                    )
+                    report(label, result[f"{label}_{call}_seconds"])
+            results.append(result)
+            del knowledge
+
+
+def measure(function, *args):
+    """
+    Returns (result, seconds, peak bytes) of calling `function`: timed
+    on its own, then called again under tracemalloc, which slows it
+    down, for the most memory it allocates at once.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def report(label, seconds, peak=None):
+    memory = "" if peak is None else f" {peak / 2 ** 20:>9.1f} MiB peak"
+    print(f"      {label:<14} {seconds:>9.4f} s{memory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import argparse
+import itertools
+import random
+
+import sat
+from logic import *
+
+ROLES = ["Knight", "Knave", "Spy"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate and solve a random knights and knaves puzzle."
+    )
+    parser.add_argument("characters", type=int, help="number of characters")
+    parser.add_argument("--statements", type=int, default=1,
+                        help="statements made by each character")
+    parser.add_argument("--spy", action="store_true",
+                        help="make exactly one character a spy")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    knowledge, characters, statements = generate(
+        args.characters, args.seed, args.spy, args.statements
+    )
+    for speaker, text, _ in statements:
+        print(f"{speaker} says \"{text}\"")
+
+    symbols = [symbol for roles in characters.values()
+               for symbol in roles.values()]
+    for symbol, holds in zip(symbols, sat.entails_many(knowledge, symbols)):
+        if holds:
+            print(f"    {symbol}")
+
+
+def generate(n, seed=None, spy=False, statements=1):
+    """
+    Returns (knowledge, characters, statements) for a random puzzle of
+    `n` characters, each a knight or a knave, or, if `spy`, exactly one
+    of them a spy, who each say `statements` things about the others.
+
+    The puzzle is made up around a hidden answer, so it always has at
+    least one solution: knights say what is true of it, knaves what is
+    false, and the spy either. `characters` maps each name to its
+    symbols by role, and `statements` lists (name, text, sentence) for
+    what each character says.
+    """
+    rng = random.Random(seed)
+    roles = ROLES if spy else ROLES[:2]
+    characters = {
+        name(i): {role: Symbol(f"{name(i)} is a {role}") for role in roles}
+        for i in range(n)
+    }
+    names = list(characters)
+
+    # The hidden answer, as the model the statements are checked against
+    answer = {name: rng.choice(roles[:2]) for name in names}
+    if spy:
+        answer[rng.choice(names)] = "Spy"
+    model = {
+        symbol.name: answer[name] == role
+        for name, symbols in characters.items()
+        for role, symbol in symbols.items()
+    }
+
+    # Game rules: everyone has exactly one role, and one of them is a spy
+    knowledge = And()
+    for symbols in characters.values():
+        knowledge.add(And(
+            Or(*symbols.values()),
+            *[Not(And(a, b))
+              for a, b in itertools.combinations(symbols.values(), 2)]
+        ))
+    if spy:
+        # Written out pairwise, so grows with the square of n
+        spies = [characters[name]["Spy"] for name in names]
+        knowledge.add(Or(*spies))
+        for a, b in itertools.combinations(spies, 2):
+            knowledge.add(Not(And(a, b)))
+
+    # What characters said
+    said = []
+    for i, speaker in enumerate(names):
+        for _ in range(statements):
+            text, sentence = statement(rng, characters, names, i, roles)
+            if answer[speaker] != "Spy" and (
+                sentence.evaluate(model) != (answer[speaker] == "Knight")
+            ):
+                text, sentence = f"It is not true that {text}", Not(sentence)
+            said.append((speaker, text, sentence))
+
+            symbols = characters[speaker]
+            knowledge.add(Implication(symbols["Knight"], sentence))
+            knowledge.add(Implication(symbols["Knave"], Not(sentence)))
+    return knowledge, characters, said
+
+
+def statement(rng, characters, names, speaker, roles):
+    """
+    Returns (text, sentence) for something random the character
+    `names[speaker]` says about one or two others, or themselves if
+    they are alone.
+    """
+    others = len(names) - 1
+    if others == 0:
+        x = y = names[speaker]
+    else:
+        # Pick among everyone but the speaker by skipping over them
+        i, j = rng.sample(range(others), 2) if others > 1 else (0, 0)
+        x, y = names[i + (i >= speaker)], names[j + (j >= speaker)]
+    role = rng.choice(roles)
+    me, a, b = characters[names[speaker]], characters[x], characters[y]
+
+    kind = rng.randrange(7)
+    if kind == 0:
+        return f"{x} is a {role.lower()}.", a[role]
+    if kind == 1:
+        return f"{x} is not a {role.lower()}.", Not(a[role])
+    if kind in (2, 3):
+        same = Or(*[And(me[r], a[r]) for r in roles])
+        if kind == 2:
+            return f"{x} and I are the same kind.", same
+        return f"{x} and I are of different kinds.", Not(same)
+    if kind == 4:
+        return (f"{x} or {y} is a knave.",
+                Or(a["Knave"], b["Knave"]))
+    if kind == 5:
+        return (f"{y} is a knave if {x} is a knight.",
+                Implication(a["Knight"], b["Knave"]))
+    return (f"{x} is a knight if and only if {y} is a knight.",
+            Biconditional(a["Knight"], b["Knight"]))
+
+
+def name(i):
+    """Returns the name of character i: A to Z, then AA, AB and so on."""
+    letters = ""
+    i += 1
+    while i:
+        i, letter = divmod(i - 1, 26)
+        letters = chr(ord("A") + letter) + letters
+    return letters
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,43 @@
+import contextlib
+import functools
 import itertools
 
+# Models evaluated together by the bitset backend, as a power of two
+LANE_BITS = 16
+
 
 class Sentence():
+    """
+    Node of a logical sentence. A sentence that contains no And is
+    frozen: it cannot change, so it keeps its hash, and the set of its
+    symbols, once asked. Within `Sentence.interning()`, building a
+    frozen sentence equal to one built before returns that one.
+    """
+
+    __slots__ = ("frozen", "_hash", "_symbols")
+
+    # Frozen sentences by key while interning, or None
+    interned = None
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Sentence) or type(self) is not type(other):
+            return False
+        if self.frozen and other.frozen and hash(self) != hash(other):
+            return False
+        return self.key() == other.key()
+
+    def __hash__(self):
+        if self._hash is not None:
+            return self._hash
+        value = hash(self.key())
+        if self.frozen:
+            self._hash = value
+        return value
+
+    def __reduce__(self):
+        return (type(self), tuple(self.operands()))
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,13 +49,77 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        if self._symbols is not None:
+            return set(self._symbols)
+        names = set()
+        seen = {id(self)}
+        stack = [self]
+        while stack:
+            for operand in stack.pop().operands():
+                if operand._symbols is not None:
+                    names |= operand._symbols
+                elif isinstance(operand, Symbol):
+                    names.add(operand.name)
+                elif id(operand) not in seen:
+                    seen.add(id(operand))
+                    stack.append(operand)
+        if self.frozen:
+            self._symbols = frozenset(names)
+        return names
+
+    def operands(self):
+        """Returns the sentences this sentence is made of."""
+        return ()
+
+    def key(self):
+        """Returns a tuple equal for sentences that are equal."""
+        raise Exception("nothing to compare")
+
+    def compile(self, program):
+        """
+        Adds instructions computing the logical sentence to a Program.
+        Returns the register holding its value.
+        """
+        raise Exception("nothing to compile")
 
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
             raise TypeError("must be a logical sentence")
 
+    @classmethod
+    @contextlib.contextmanager
+    def interning(cls):
+        """
+        Shares frozen sentences built within the block: building one
+        equal to one built before in it returns that one.
+        """
+        previous = Sentence.interned
+        if previous is None:
+            Sentence.interned = {}
+        try:
+            yield
+        finally:
+            Sentence.interned = previous
+
+    @classmethod
+    def intern(cls, operands, *fields):
+        """
+        Returns the frozen node of this class built from `operands`
+        while interning, first building it with `fields` as the values
+        of its slots if there is none.
+        """
+        key = (cls,) + operands
+        node = Sentence.interned.get(key)
+        if node is None:
+            node = object.__new__(cls)
+            for name, value in zip(cls.__slots__, fields):
+                setattr(node, name, value)
+            node.frozen = True
+            node._hash = node._symbols = None
+            Sentence.interned[key] = node
+        return node
+
     @classmethod
     def parenthesize(cls, s):
         """Parenthesizes an expression if not already parenthesized."""
@@ -43,15 +143,22 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        if Sentence.interned is not None:
+            return cls.intern((name,), name)
+        node = object.__new__(cls)
+        node.name = name
+        node.frozen = True
+        node._hash = node._symbols = None
+        return node
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def key(self):
+        return ("symbol", self.name)
 
     def __repr__(self):
         return self.name
@@ -68,17 +175,25 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def compile(self, program):
+        return program.symbol(self.name)
+
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ("operand",)
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        if operand.frozen and Sentence.interned is not None:
+            return cls.intern((operand,), operand)
+        node = object.__new__(cls)
+        node.operand = operand
+        node.frozen = operand.frozen
+        node._hash = node._symbols = None
+        return node
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def key(self):
+        return ("not", self.operand)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +204,25 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def operands(self):
+        return (self.operand,)
+
+    def compile(self, program):
+        return program.emit("not", self.operand.compile(program))
 
 
 class And(Sentence):
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
+        self.frozen = False
+        self._hash = self._symbols = None
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def key(self):
+        return ("and",) + tuple(self.conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -126,23 +243,32 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def operands(self):
+        return self.conjuncts
+
+    def compile(self, program):
+        return program.emit(
+            "and", *[conjunct.compile(program) for conjunct in self.conjuncts]
+        )
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        frozen = all(disjunct.frozen for disjunct in disjuncts)
+        if frozen and Sentence.interned is not None:
+            return cls.intern(disjuncts, list(disjuncts))
+        node = object.__new__(cls)
+        node.disjuncts = list(disjuncts)
+        node.frozen = frozen
+        node._hash = node._symbols = None
+        return node
+
+    def key(self):
+        return ("or",) + tuple(self.disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -157,24 +283,33 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def operands(self):
+        return self.disjuncts
+
+    def compile(self, program):
+        return program.emit(
+            "or", *[disjunct.compile(program) for disjunct in self.disjuncts]
+        )
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        frozen = antecedent.frozen and consequent.frozen
+        if frozen and Sentence.interned is not None:
+            return cls.intern((antecedent, consequent), antecedent, consequent)
+        node = object.__new__(cls)
+        node.antecedent = antecedent
+        node.consequent = consequent
+        node.frozen = frozen
+        node._hash = node._symbols = None
+        return node
+
+    def key(self):
+        return ("implies", self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +323,32 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def operands(self):
+        return (self.antecedent, self.consequent)
+
+    def compile(self, program):
+        return program.emit("implies", self.antecedent.compile(program),
+                            self.consequent.compile(program))
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        frozen = left.frozen and right.frozen
+        if frozen and Sentence.interned is not None:
+            return cls.intern((left, right), left, right)
+        node = object.__new__(cls)
+        node.left = left
+        node.right = right
+        node.frozen = frozen
+        node._hash = node._symbols = None
+        return node
+
+    def key(self):
+        return ("biconditional", self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -221,12 +364,232 @@ class Biconditional(Sentence):
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
+    def operands(self):
+        return (self.left, self.right)
+
+    def compile(self, program):
+        return program.emit("iff", self.left.compile(program),
+                            self.right.compile(program))
+
+
+class Program():
+    """
+    Flat evaluation program compiled from sentences, over symbols
+    numbered in the order they are first met. Each instruction computes
+    one subformula from the registers of earlier ones, and identical
+    subformulas share one instruction.
+
+    Programs are run on many models at once: every value is an integer
+    whose bits are lanes, one model each.
+    """
+
+    def __init__(self):
+        self.symbols = []
+        self.numbers = {}
+        self.instructions = []
+        self.registers = {}
+
+    def symbol(self, name):
+        """Returns the register holding the value of symbol `name`."""
+        if name not in self.numbers:
+            self.numbers[name] = len(self.symbols)
+            self.symbols.append(name)
+        return self.emit("symbol", self.numbers[name])
+
+    def emit(self, operation, *operands):
+        """
+        Adds an instruction, unless an identical one exists.
+        Returns the register holding its result.
+        """
+        instruction = (operation, operands)
+        if instruction not in self.registers:
+            self.registers[instruction] = len(self.instructions)
+            self.instructions.append(instruction)
+        return self.registers[instruction]
+
+    def run(self, inputs, mask, values=None):
+        """
+        Returns the value of every register, given the value `inputs[i]`
+        of each symbol i, over the models that are the bits of `mask`.
+        Continues from the registers already computed in `values`.
+        """
+        values = [] if values is None else values
+        for operation, operands in self.instructions[len(values):]:
+            if operation == "symbol":
+                value = inputs[operands[0]]
+            elif operation == "not":
+                value = mask ^ values[operands[0]]
+            elif operation == "and":
+                value = mask
+                for operand in operands:
+                    value &= values[operand]
+            elif operation == "or":
+                value = 0
+                for operand in operands:
+                    value |= values[operand]
+            elif operation == "implies":
+                value = (mask ^ values[operands[0]]) | values[operands[1]]
+            else:
+                value = mask ^ values[operands[0]] ^ values[operands[1]]
+            values.append(value)
+        return values
+
+
+def chunk_inputs(width, chunk, count):
+    """
+    Returns the values of `count` symbols over 2 ** `width` models:
+    those whose assignment to the symbols numbered `width` and above is
+    the bits of `chunk`, and where bit m of each value is its value when
+    symbol i is true exactly if bit i of m is set.
+    """
+    mask = (1 << (1 << width)) - 1
+    return [
+        lanes(width, i) if i < width
+        else mask if chunk >> (i - width) & 1 else 0
+        for i in range(count)
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def lanes(width, i):
+    """
+    Returns the 2 ** `width` lanes of symbol i: blocks of 2 ** i zeros
+    and 2 ** i ones, repeated.
+    """
+    value = ((1 << (1 << i)) - 1) << (1 << i)
+    length = 1 << (i + 1)
+    while length < 1 << width:
+        value |= value << length
+        length <<= 1
+    return value
+
+
+def bitset_check(knowledge, query, width=LANE_BITS):
+    """
+    Checks if knowledge base entails query by compiling both into one
+    Program and running it on up to 2 ** `width` models at a time.
+    """
+    program = Program()
+    knowledge_register = knowledge.compile(program)
+    query_register = query.compile(program)
+
+    count = len(program.symbols)
+    width = min(width, count)
+    mask = (1 << (1 << width)) - 1
+    for chunk in range(1 << (count - width)):
+        values = program.run(chunk_inputs(width, chunk, count), mask)
+        if values[knowledge_register] & (mask ^ values[query_register]):
+            return False
+    return True
+
+
+class Models():
+    """
+    The models of a knowledge base, enumerated once, against which any
+    number of queries can be checked. Conjuncts added later narrow the
+    models down without enumerating them again.
+
+    Each model is an integer whose bit i is the value of symbol i of a
+    Program holding the knowledge base and every query checked so far.
+    """
+
+    def __init__(self, knowledge, solutions=None, width=LANE_BITS):
+        """
+        Enumerates the models of `knowledge` up to 2 ** `width` at a
+        time or, if given, takes them from `solutions`, an iterable of
+        dictionaries mapping each symbol of `knowledge` to its value.
+        """
+        self.knowledge = knowledge
+        self.program = Program()
+        register = knowledge.compile(self.program)
+        self.count = len(self.program.symbols)
+
+        if solutions is not None:
+            self.models = [
+                sum(1 << i for i, name in enumerate(self.program.symbols)
+                    if solution[name])
+                for solution in solutions
+            ]
+        else:
+            self.models = []
+            width = min(width, self.count)
+            mask = (1 << (1 << width)) - 1
+            for chunk in range(1 << (self.count - width)):
+                inputs = chunk_inputs(width, chunk, self.count)
+                value = self.program.run(inputs, mask)[register]
+                while value:
+                    low = value & -value
+                    self.models.append((chunk << width) | (low.bit_length() - 1))
+                    value ^= low
+        self.values = None
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def add(self, conjunct):
+        """
+        Adds a conjunct to the knowledge base, keeping only the models
+        in which it holds.
+        """
+        if isinstance(self.knowledge, And):
+            self.knowledge.add(conjunct)
+        else:
+            self.knowledge = And(self.knowledge, conjunct)
+        value = self.evaluate(conjunct.compile(self.program))
+        self.models = [
+            model for j, model in enumerate(self.models) if value >> j & 1
+        ]
+        self.values = None
+
+    def entails(self, query):
+        """Checks if knowledge base entails query."""
+        value = self.evaluate(query.compile(self.program))
+        return value == (1 << len(self.models)) - 1
+
+    def evaluate(self, register):
+        """
+        Returns the value of a register in each model, bit j for model j,
+        computing only the registers compiled since the last call.
+
+        Models are first extended with every assignment to symbols the
+        program has gained, which the knowledge base leaves free.
+        """
+        count = len(self.program.symbols)
+        if count > self.count:
+            self.models = [
+                model | extension << self.count
+                for model in self.models
+                for extension in range(1 << (count - self.count))
+            ]
+            self.count = count
+            self.values = None
+
+        if self.values is None:
+            self.inputs = [
+                int("".join("1" if model >> i & 1 else "0"
+                            for model in reversed(self.models)) or "0", 2)
+                for i in range(count)
+            ]
+            self.values = []
+        mask = (1 << len(self.models)) - 1
+        return self.program.run(self.inputs, mask, self.values)[register]
+
+
+def model_check_many(knowledge, queries):
+    """
+    Checks which queries knowledge base entails, enumerating its models
+    once. Returns a list of True or False, one per query.
+    """
+    models = Models(knowledge)
+    return [models.entails(query) for query in queries]
+
+
+def model_check(knowledge, query, backend="enumerate"):
+    """
+    Checks if knowledge base entails query, enumerating models one at
+    a time or, with the "bitset" backend, many at once.
+    """
+    if backend == "bitset":
+        return bitset_check(knowledge, query)
+    if backend != "enumerate":
+        raise ValueError(f"unknown backend: {backend}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -0,0 +1,426 @@
+import heapq
+
+from logic import *
+
+# Conflicts between restarts, scaled by the Luby sequence
+RESTART = 100
+
+# Factor by which earlier conflicts count less than the latest
+DECAY = 0.95
+
+# Learned clauses kept before the longest half are forgotten, and the
+# factor by which that number grows each time
+LEARNED = 2000
+GROWTH = 1.1
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query, by checking that the
+    knowledge base and the negation of the query are unsatisfiable.
+    """
+    program = Program()
+    solver = encode(program, knowledge)
+    register = query.compile(program)
+    solver.extend(program)
+    return not solver.solve([-solver.literals[register]])
+
+
+def entails_many(knowledge, queries):
+    """
+    Checks which queries knowledge base entails with one solver, asking
+    for each in turn whether it can be false. A model found that way
+    also rules out every later query false in it. Returns a list of
+    True or False, one per query.
+    """
+    program = Program()
+    solver = encode(program, knowledge)
+    registers = [query.compile(program) for query in queries]
+    solver.extend(program)
+    literals = [solver.literals[register] for register in registers]
+
+    entailed = [True] * len(literals)
+    for i, literal in enumerate(literals):
+        if entailed[i] and solver.solve([-literal]):
+            model = solver.model
+            for j in range(i, len(literals)):
+                if model[abs(literals[j])] != (literals[j] > 0):
+                    entailed[j] = False
+    return entailed
+
+
+def satisfiable(knowledge):
+    """
+    Returns a model of the knowledge base, mapping each of its symbols
+    to True or False, or None if it is unsatisfiable.
+    """
+    return next(solutions(knowledge), None)
+
+
+def solutions(knowledge):
+    """
+    Yields every model of the knowledge base, as satisfiable returns
+    them, ruling out each one found before solving again.
+    """
+    program = Program()
+    solver = encode(program, knowledge)
+    variables = [
+        solver.literals[program.symbol(name)] for name in program.symbols
+    ]
+    while solver.solve():
+        model = [solver.model[v] for v in variables]
+        yield dict(zip(program.symbols, model))
+        if not solver.add_clause([
+            -v if value else v for v, value in zip(variables, model)
+        ]):
+            return
+
+
+def encode(program, knowledge):
+    """
+    Returns a Solver of the clauses of `knowledge` compiled into
+    `program`, asserting that the knowledge base holds. The conjuncts
+    of a knowledge base that is an And are asserted one by one, rather
+    than defining the And with one clause as long as all of them.
+    """
+    solver = Solver()
+    if isinstance(knowledge, And):
+        registers = [conjunct.compile(program)
+                     for conjunct in knowledge.conjuncts]
+    else:
+        registers = [knowledge.compile(program)]
+    solver.extend(program, *registers)
+    return solver
+
+
+def tseitin(operation, literal, inputs):
+    """
+    Returns clauses making `literal` equal to the result of an "and",
+    "or", "implies" or "iff" instruction over literals `inputs`.
+    """
+    if operation == "implies":
+        operation, inputs = "or", [-inputs[0], inputs[1]]
+    if operation == "and":
+        return [[-literal, a] for a in inputs] + [
+            [literal] + [-a for a in inputs]
+        ]
+    if operation == "or":
+        return [[literal, -a] for a in inputs] + [[-literal] + inputs]
+    a, b = inputs
+    return [[-literal, -a, b], [-literal, a, -b],
+            [literal, a, b], [literal, -a, -b]]
+
+
+def luby(i):
+    """
+    Returns the i-th term, from 1, of the Luby sequence 1, 1, 2, 1, 1,
+    2, 4, 1, ..., the multiples of RESTART conflicts between restarts.
+    """
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    if i == (1 << k) - 1:
+        return 1 << (k - 1)
+    return luby(i - (1 << (k - 1)) + 1)
+
+
+class Solver():
+    """
+    Conflict-driven clause learning SAT solver over variables numbered
+    from 1, with literals v and -v for variable v being true and false.
+
+    Unit propagation watches two literals of each clause, visiting a
+    clause only when one of them becomes false. Each conflict adds a
+    clause learned at its first unique implication point and jumps back
+    to where that clause propagates. Decisions follow the variables most
+    involved in recent conflicts, with their last value.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.literals = []
+        self.values = [0]
+        self.watches = [[]]
+        self.levels = [0]
+        self.reasons = [None]
+        self.phases = [-1]
+        self.activity = [0.0]
+        self.bump = 1.0
+        self.heap = []
+        self.learned = []
+        self.capacity = LEARNED
+        self.trail = []
+        self.limits = []
+        self.head = 0
+        self.ok = True
+        self.model = None
+
+    def variable(self):
+        """Returns a new variable."""
+        self.count += 1
+        v = self.count
+
+        # Values and watches are indexed by literal, negative from the end
+        self.values[v:v] = [0, 0]
+        self.watches[v:v] = [[], []]
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.phases.append(-1)
+        self.activity.append(0.0)
+        heapq.heappush(self.heap, (0.0, v))
+        return v
+
+    def extend(self, program, *assertions):
+        """
+        Adds variables and Tseitin clauses for the instructions added to
+        a logic.Program since last time, giving every symbol and every
+        other subformula a variable and every negation the negation of
+        its operand's literal, then asserts the registers `assertions`.
+        """
+        for operation, operands in program.instructions[len(self.literals):]:
+            if operation == "not":
+                self.literals.append(-self.literals[operands[0]])
+                continue
+            literal = self.variable()
+            self.literals.append(literal)
+            if operation != "symbol":
+                inputs = [self.literals[operand] for operand in operands]
+                for clause in tseitin(operation, literal, inputs):
+                    self.add_clause(clause)
+        for register in assertions:
+            self.add_clause([self.literals[register]])
+
+    def add_clause(self, literals):
+        """
+        Adds a clause, a list of literals at least one of which is true.
+        Returns False if the clauses are now known to be unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        clause = []
+        seen = set()
+        for literal in literals:
+            if self.values[literal] == 1 or -literal in seen:
+                return self.ok
+            if self.values[literal] == 0 and literal not in seen:
+                seen.add(literal)
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.ok and self.propagate() is None
+        else:
+            self.watches[clause[0]].append(clause)
+            self.watches[clause[1]].append(clause)
+        return self.ok
+
+    def solve(self, assumptions=()):
+        """
+        Returns whether the clauses are satisfiable with the literals
+        `assumptions` true, storing a satisfying assignment, indexed by
+        variable, in `model`. Clauses learned are kept for later calls.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        restarts, conflicts, limit = 1, 0, RESTART
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.limits:
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) > 1:
+                    self.watches[learned[0]].append(learned)
+                    self.watches[learned[1]].append(learned)
+                if len(learned) > 2:
+                    self.learned.append(learned)
+                self.assign(learned[0], learned)
+                self.bump /= DECAY
+                conflicts += 1
+                continue
+
+            if conflicts >= limit:
+                restarts += 1
+                conflicts, limit = 0, RESTART * luby(restarts)
+                self.backtrack(0)
+                continue
+            if len(self.learned) >= self.capacity:
+                self.forget()
+
+            # Assume each assumption in turn, then decide
+            literal = None
+            while len(self.limits) < len(assumptions):
+                assumption = assumptions[len(self.limits)]
+                if self.values[assumption] == -1:
+                    self.backtrack(0)
+                    return False
+                self.limits.append(len(self.trail))
+                if self.values[assumption] == 0:
+                    literal = assumption
+                    break
+            if literal is None:
+                literal = self.decide()
+                if literal is None:
+                    self.model = [value == 1
+                                  for value in self.values[:self.count + 1]]
+                    self.backtrack(0)
+                    return True
+                self.limits.append(len(self.trail))
+            self.assign(literal, None)
+
+    def assign(self, literal, reason):
+        v = abs(literal)
+        self.values[literal] = 1
+        self.values[-literal] = -1
+        self.levels[v] = len(self.limits)
+        self.reasons[v] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal the clauses imply, and returns a clause
+        whose literals are all false, or None if there is none.
+        """
+        values, watches, trail = self.values, self.watches, self.trail
+        levels, reasons, level = self.levels, self.reasons, len(self.limits)
+        while self.head < len(trail):
+            false = -trail[self.head]
+            self.head += 1
+            watching = watches[false]
+            watches[false] = kept = []
+            for i, clause in enumerate(watching):
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                if values[first] == 1:
+                    kept.append(clause)
+                    continue
+
+                # Watch another literal that is not false, if any
+                for k in range(2, len(clause)):
+                    if values[clause[k]] != -1:
+                        clause[1], clause[k] = clause[k], false
+                        watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if values[first] == -1:
+                        kept.extend(watching[i + 1:])
+                        self.head = len(trail)
+                        return clause
+                    values[first] = 1
+                    values[-first] = -1
+                    levels[abs(first)] = level
+                    reasons[abs(first)] = clause
+                    trail.append(first)
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns (clause, level): a clause learned from a conflict, which
+        becomes unit, with its first literal unassigned, once decisions
+        above `level` are undone.
+        """
+        levels, trail = self.levels, self.trail
+        level = len(self.limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        index = len(trail) - 1
+        clause, literal = conflict, None
+        while True:
+            for other in clause:
+                v = abs(other)
+                if other != literal and v not in seen and levels[v] > 0:
+                    seen.add(v)
+                    self.increase(v)
+                    if levels[v] == level:
+                        pending += 1
+                    else:
+                        learned.append(other)
+
+            # Resolve with the reason of the latest literal in the conflict
+            while abs(trail[index]) not in seen:
+                index -= 1
+            literal = trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+
+        # Drop literals implied false by others already in the clause
+        learned = [-literal] + [
+            other for other in learned[1:]
+            if self.reasons[abs(other)] is None or any(
+                abs(reason) not in seen and levels[abs(reason)] > 0
+                for reason in self.reasons[abs(other)] if reason != -other
+            )
+        ]
+        if len(learned) == 1:
+            return learned, 0
+        latest = max(range(1, len(learned)),
+                     key=lambda i: levels[abs(learned[i])])
+        learned[1], learned[latest] = learned[latest], learned[1]
+        return learned, levels[abs(learned[1])]
+
+    def forget(self):
+        """
+        Forgets the longer half of the learned clauses, except those
+        that are the reason for an assignment, and keeps more next time.
+        """
+        self.learned.sort(key=len)
+        keep = len(self.learned) // 2
+        forgotten = set()
+        for clause in self.learned[keep:]:
+            if self.reasons[abs(clause[0])] is not clause:
+                forgotten.add(id(clause))
+        self.learned = [
+            clause for clause in self.learned if id(clause) not in forgotten
+        ]
+        self.watches = [
+            [clause for clause in watching if id(clause) not in forgotten]
+            for watching in self.watches
+        ]
+        self.capacity *= GROWTH
+
+    def increase(self, v):
+        """Bumps the activity of variable v."""
+        self.activity[v] += self.bump
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.bump *= 1e-100
+            self.heap = [(-self.activity[u], u) for _, u in self.heap]
+            heapq.heapify(self.heap)
+
+    def decide(self):
+        """
+        Returns the literal of the most active unassigned variable, with
+        its last value, or None if every variable is assigned.
+        """
+        while self.heap:
+            _, v = heapq.heappop(self.heap)
+            if self.values[v] == 0:
+                return v if self.phases[v] > 0 else -v
+        return None
+
+    def backtrack(self, level):
+        """Undoes the assignments made above decision level `level`."""
+        if len(self.limits) <= level:
+            return
+        start = self.limits[level]
+        for literal in self.trail[start:]:
+            v = abs(literal)
+            self.phases[v] = 1 if literal > 0 else -1
+            self.values[literal] = self.values[-literal] = 0
+            self.reasons[v] = None
+            heapq.heappush(self.heap, (-self.activity[v], v))
+        del self.trail[start:]
+        del self.limits[level:]
+        self.head = len(self.trail)
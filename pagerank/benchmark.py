@@ -0,0 +1,201 @@
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import engine
+import outofcore
+import pagerank
+
+# Largest corpus the original O(N^2) iteration is run on
+LEGACY_PAGES = 2000
+
+SIZES = [10000, 100000, 1000000]
+
+
+def main():
+    if len(sys.argv) > 1:
+        sys.exit("Usage: python benchmark.py")
+
+    print("Iterating")
+    benchmark_iterate([LEGACY_PAGES] + SIZES)
+
+    print("Solving")
+    benchmark_solvers(
+        [(corpus, engine.Links.from_corpus(pagerank.crawl(corpus)))
+         for corpus in ["corpus0", "corpus1", "corpus2"]] +
+        [(f"{n} pages", generate(n)) for n in SIZES[:2]]
+    )
+
+    print("Personalizing")
+    benchmark_personalized([(10000, 256), (100000, 32)])
+
+    print("Out of core")
+    benchmark_outofcore(SIZES[-1], [64 << 20, 256 << 20])
+
+    print("Sampling")
+    benchmark_sample(LEGACY_PAGES, pagerank.SAMPLES)
+    benchmark_sample(100000, 10000000)
+
+
+def benchmark_iterate(sizes):
+    """
+    Time the original iteration against the sparse engine
+    on generated corpora of each size.
+    """
+    for n in sizes:
+        links = generate(n)
+        print(f"  {n:>9} pages {len(links.sources):>10} links")
+
+        if n <= LEGACY_PAGES:
+            corpus = to_corpus(links)
+            start = time.perf_counter()
+            expected = pagerank.iterate_pagerank(corpus, pagerank.DAMPING)
+            report("legacy", time.perf_counter() - start)
+
+            start = time.perf_counter()
+            ranks = engine.iterate_pagerank(corpus, pagerank.DAMPING)
+            report("dict", time.perf_counter() - start)
+            error = max(abs(ranks[page] - expected[page]) for page in ranks)
+            print(f"      largest difference from legacy: {error:.2e}")
+
+        start = time.perf_counter()
+        engine.pagerank(links, pagerank.DAMPING)
+        report("sparse", time.perf_counter() - start)
+
+
+def benchmark_sample(n, samples):
+    """
+    Time the original sampler against the vectorized one on a
+    generated corpus, and compare both to the iterated ranks.
+    """
+    links = generate(n)
+    expected = engine.pagerank(links, pagerank.DAMPING)
+    print(f"  {n:>9} pages {samples:>10} samples")
+
+    if n <= LEGACY_PAGES:
+        corpus = to_corpus(links)
+        start = time.perf_counter()
+        ranks = pagerank.sample_pagerank(corpus, pagerank.DAMPING, samples)
+        report("legacy", time.perf_counter() - start)
+        error = sum(abs(ranks[page] - expected[i])
+                    for i, page in enumerate(links.pages))
+        print(f"      L1 error against iteration: {error:.4f}")
+
+    start = time.perf_counter()
+    ranks = engine.sample(links, pagerank.DAMPING, samples, seed=0)
+    report("vectorized", time.perf_counter() - start)
+    print(f"      L1 error against iteration: "
+          f"{np.abs(ranks - expected).sum():.4f}")
+
+
+def benchmark_solvers(corpora):
+    """
+    Compare iterations and time to convergence of every solver
+    on each (name, links) corpus.
+    """
+    for name, links in corpora:
+        expected = engine.pagerank(links, pagerank.DAMPING, 1e-14)
+        print(f"  {name}")
+        for method in engine.SOLVERS:
+            ranks, telemetry = engine.solve(links, pagerank.DAMPING, method)
+            error = np.abs(ranks - expected).sum()
+            print(f"    {method:<12} {telemetry[-1]['seconds']:9.3f} s "
+                  f"{len(telemetry):5} iterations  L1 error {error:.1e}")
+
+
+def benchmark_personalized(cases):
+    """
+    Time solving K personalized PageRank vectors as one block against
+    solving them one at a time, for each (pages, K) case.
+    """
+    for n, k in cases:
+        links = generate(n)
+        rng = np.random.default_rng(0)
+        teleport = engine.teleport_matrix(
+            links, [rng.choice(links.pages, 5) for _ in range(k)]
+        )
+        print(f"  {n:>9} pages {k:>5} teleport vectors")
+
+        start = time.perf_counter()
+        ranks = engine.personalized(links, pagerank.DAMPING, teleport)
+        report("block", time.perf_counter() - start)
+
+        # Built once for all columns, as the block builds it once too
+        start = time.perf_counter()
+        transition = engine.transition_matrix(links)
+        looped = np.column_stack([
+            engine.personalized(links, pagerank.DAMPING, teleport[:, [j]],
+                                transition=transition)
+            for j in range(k)
+        ])
+        report("one by one", time.perf_counter() - start)
+        print(f"      largest difference: {np.abs(ranks - looped).max():.1e}")
+
+
+def benchmark_outofcore(n, ceilings):
+    """
+    Time ranking a generated corpus from a link store on disk under each
+    memory ceiling, against the in-memory engine, with peak memory.
+    """
+    links = generate(n)
+    print(f"  {n:>9} pages {len(links.sources):>10} links")
+    start = time.perf_counter()
+    tracemalloc.start()
+    expected = engine.pagerank(links, pagerank.DAMPING)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    report("in memory", time.perf_counter() - start)
+    print(f"      peak memory: {peak / (1 << 20):.1f} MiB")
+
+    with tempfile.TemporaryDirectory() as store:
+        outofcore.save(links, store)
+        del links
+        for memory in ceilings:
+            start = time.perf_counter()
+            tracemalloc.start()
+            ranks, _ = outofcore.rank(store, pagerank.DAMPING, memory=memory)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            report(f"{memory >> 20} MiB", time.perf_counter() - start)
+            print(f"      peak memory: {peak / (1 << 20):.1f} MiB, "
+                  f"L1 difference {np.abs(ranks - expected).sum():.1e}")
+
+
+def report(label, seconds):
+    print(f"    {label:<12} {seconds:9.3f} s")
+
+
+def generate(n, seed=0):
+    """
+    Returns the links of a random corpus of `n` pages with power-law
+    out-degrees and link popularity, where a tenth of pages have no links.
+    """
+    rng = np.random.default_rng(seed)
+    out_degree = np.minimum(rng.zipf(2.0, n), 1000)
+    out_degree[rng.random(n) < 0.1] = 0
+    sources = np.repeat(np.arange(n), out_degree)
+    targets = (n * rng.random(len(sources)) ** 3).astype(np.int64)
+
+    # Drop self-links and duplicates, as crawl does
+    keep = sources != targets
+    edges = np.unique(sources[keep] * n + targets[keep])
+    return engine.Links(
+        [f"{i}.html" for i in range(n)], edges // n, edges % n
+    )
+
+
+def to_corpus(links):
+    """
+    Returns the `crawl` dictionary of a link structure.
+    """
+    corpus = {page: set() for page in links.pages}
+    for source, target in zip(links.sources, links.targets):
+        corpus[links.pages[source]].add(links.pages[target])
+    return corpus
+
+
+if __name__ == "__main__":
+    main()
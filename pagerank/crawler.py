@@ -0,0 +1,121 @@
+import codecs
+import multiprocessing
+import os
+import posixpath
+import re
+import sys
+import time
+from array import array
+
+import engine
+import pagerank
+
+# Bytes read from a file at a time
+CHUNK = 1 << 16
+
+# Longest unfinished tag carried over between chunks
+MAX_TAG = 1 << 16
+
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+
+def main():
+    if not 2 <= len(sys.argv) <= 3:
+        sys.exit("Usage: python crawler.py corpus [workers]")
+    workers = int(sys.argv[2]) if len(sys.argv) == 3 else None
+
+    start = time.perf_counter()
+    links = crawl(sys.argv[1], workers)
+    seconds = time.perf_counter() - start
+    print(f"Crawled {len(links)} pages and {len(links.sources)} links "
+          f"in {seconds:.3f} s ({len(links) / seconds:.1f} pages/sec)")
+
+    ranks = engine.pagerank(links, pagerank.DAMPING)
+    print("Top pages")
+    for i in ranks.argsort()[::-1][:10]:
+        print(f"  {links.pages[i]}: {ranks[i]:.4f}")
+
+
+def crawl(directory, workers=None):
+    """
+    Parse every HTML page under `directory`, recursively, for links
+    to other pages of the corpus, spreading files over `workers`
+    processes (all CPUs by default, none if 1).
+
+    Returns the engine.Links edge list, where pages are named by their
+    path relative to `directory` and links are resolved relative
+    to the page they appear on.
+    """
+    pages = sorted(find_pages(directory))
+    index = {page: i for i, page in enumerate(pages)}
+    tasks = [(directory, page) for page in pages]
+
+    if workers == 1:
+        results = map(extract_links, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap(extract_links, tasks,
+                            chunksize=max(1, len(tasks) // 256))
+
+    sources, targets = array("i"), array("i")
+    try:
+        for source, links in enumerate(results):
+            for link in links:
+                target = index.get(link)
+                if target is not None and target != source:
+                    sources.append(source)
+                    targets.append(target)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return engine.Links(pages, sources, targets)
+
+
+def find_pages(directory):
+    """
+    Yields the path of every HTML file under `directory`,
+    relative to it and separated by "/".
+    """
+    for root, _, filenames in os.walk(directory):
+        relative = os.path.relpath(root, directory)
+        for filename in filenames:
+            if filename.endswith(".html"):
+                if relative == os.curdir:
+                    yield filename
+                else:
+                    yield posixpath.join(*relative.split(os.sep), filename)
+
+
+def extract_links(task):
+    """
+    Returns the set of pages linked to by one page, reading its file
+    a chunk at a time.
+    """
+    directory, page = task
+    base = posixpath.dirname(page)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    links = set()
+    pending = ""
+    with open(os.path.join(directory, *page.split("/")), "rb") as f:
+        while True:
+            chunk = f.read(CHUNK)
+            text = pending + decoder.decode(chunk, final=not chunk)
+            end = 0
+            for match in LINK.finditer(text):
+                links.add(posixpath.normpath(
+                    posixpath.join(base, match.group(1))
+                ))
+                end = match.end()
+
+            # Keep what follows the last link, in case a tag was cut off
+            pending = text[max(end, len(text) - MAX_TAG):]
+            if not chunk:
+                break
+    return links
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+import time
+
+import numpy as np
+from scipy import sparse
+
+# Largest total change in PageRank (L1 norm) accepted as converged
+TOLERANCE = 1e-8
+
+# Most power iterations before giving up on convergence
+MAX_ITERATIONS = 1000
+
+# Independent random surfers advanced together when sampling
+WALKERS = 4096
+
+# Steps each surfer takes before its samples are counted, so the
+# uniform starting pages do not bias short walks
+BURN_IN = 50
+
+# Iterations between extrapolations
+EXTRAPOLATE = 10
+
+# Blocks of pages updated in turn by Gauss-Seidel
+BLOCKS = 256
+
+# Iterations between convergence checks of personalized PageRank, as a
+# check reads the whole block twice more
+CHECK = 4
+
+
+class Links():
+    """
+    Link structure of a corpus as an edge list over page indices:
+    page `sources[k]` links to page `targets[k]`.
+    """
+
+    def __init__(self, pages, sources, targets):
+        self.pages = list(pages)
+        self.sources = np.asarray(sources, dtype=np.int32)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        self.out_degree = np.bincount(self.sources, minlength=len(self.pages))
+        self.dangling = self.out_degree == 0
+
+        # Links grouped by source page: page i links to
+        # linked[offsets[i]:offsets[i + 1]]
+        self.offsets = np.concatenate(([0], np.cumsum(self.out_degree)))
+        self.linked = self.targets[np.argsort(self.sources, kind="stable")]
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build the edge list of a `crawl` dictionary.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        count = sum(len(links) for links in corpus.values())
+        sources = np.fromiter(
+            (index[page] for page in pages for _ in corpus[page]),
+            dtype=np.int32, count=count
+        )
+        targets = np.fromiter(
+            (index[link] for page in pages for link in corpus[page]),
+            dtype=np.int32, count=count
+        )
+        return cls(pages, sources, targets)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def to_dict(self, ranks):
+        """
+        Returns a dictionary from page name to its value in `ranks`.
+        """
+        return {page: float(rank) for page, rank in zip(self.pages, ranks)}
+
+
+def sample_pagerank(corpus, damping_factor, n, walkers=WALKERS, seed=None):
+    """
+    Return PageRank values for each page by sampling `n` pages
+    with many random surfers at once, each starting on a random page.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    links = Links.from_corpus(corpus)
+    return links.to_dict(sample(links, damping_factor, n, walkers, seed))
+
+
+def sample(links, damping_factor, n, walkers=WALKERS, seed=None):
+    """
+    Returns the fraction of `n` samples spent on each page by `walkers`
+    independent random surfers, advanced together one step at a time.
+
+    Every link of a page is equally likely, so a step draws an offset
+    into the page's slice of `links.linked` instead of building
+    its transition model. Each surfer takes BURN_IN uncounted steps first.
+    """
+    rng = np.random.default_rng(seed)
+    pages = len(links)
+    walkers = max(1, min(walkers, n))
+    counts = np.zeros(pages, dtype=np.int64)
+
+    current = rng.integers(pages, size=walkers)
+    for _ in range(BURN_IN):
+        current = walk(links, current, damping_factor, rng)
+
+    remaining = n
+    while True:
+        counts += np.bincount(current[:remaining], minlength=pages)
+        remaining -= walkers
+        if remaining <= 0:
+            break
+        current = walk(links, current, damping_factor, rng)
+
+    return counts / n
+
+
+def walk(links, current, damping_factor, rng):
+    """
+    Returns the pages random surfers on pages `current` move to:
+    with probability `damping_factor` a random link of their page,
+    otherwise (or from a page without links) any page at random.
+    """
+    if not len(links.linked):
+        return rng.integers(len(links), size=len(current))
+    degree = links.out_degree[current]
+    follow = (rng.random(len(current)) < damping_factor) & (degree > 0)
+    choice = links.offsets[current] + (
+        rng.random(len(current)) * degree
+    ).astype(np.int64)
+    return np.where(
+        follow,
+        links.linked[np.minimum(choice, len(links.linked) - 1)],
+        rng.integers(len(links), size=len(current))
+    )
+
+
+def iterate_pagerank(corpus, damping_factor, tolerance=TOLERANCE,
+                     method="jacobi"):
+    """
+    Return PageRank values for each page by iterating
+    over the sparse link structure of the corpus.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    links = Links.from_corpus(corpus)
+    return links.to_dict(pagerank(links, damping_factor, tolerance,
+                                  method=method))
+
+
+def pagerank(links, damping_factor, tolerance=TOLERANCE,
+             max_iterations=MAX_ITERATIONS, method="jacobi"):
+    """
+    Returns the PageRank vector of `links`; see `solve`.
+    """
+    ranks, _ = solve(links, damping_factor, method, tolerance, max_iterations)
+    return ranks
+
+
+def solve(links, damping_factor, method="jacobi", tolerance=TOLERANCE,
+          max_iterations=MAX_ITERATIONS, ranks=None):
+    """
+    Returns (ranks, telemetry): the PageRank vector of `links` computed by
+    one of the SOLVERS, starting from `ranks` (uniform by default).
+
+    Iteration stops once an iteration changes the ranks by less than
+    `tolerance` (L1 norm), or after `max_iterations`. Telemetry holds
+    one dictionary per iteration with its number, residual and
+    the seconds elapsed since solving started.
+
+    A page without links is treated as having one link to every page,
+    itself included.
+    """
+    try:
+        solver = SOLVERS[method]
+    except KeyError:
+        raise ValueError(f"unknown PageRank method: {method}")
+
+    n = len(links)
+    if ranks is None:
+        ranks = np.full(n, 1 / n)
+    telemetry = []
+    start = time.perf_counter()
+    for iteration, (ranks, residual) in enumerate(
+        solver(links, damping_factor, np.array(ranks, dtype=float)), 1
+    ):
+        telemetry.append({
+            "iteration": iteration,
+            "residual": float(residual),
+            "seconds": time.perf_counter() - start
+        })
+        if residual < tolerance or iteration >= max_iterations:
+            break
+    return ranks / ranks.sum(), telemetry
+
+
+def jacobi(links, damping_factor, ranks):
+    """
+    Yields (ranks, residual) for each power iteration,
+    which updates every page from the previous ranks.
+    """
+    weights = 1 / links.out_degree[links.sources]
+    while True:
+        new_ranks = step(links, ranks, weights, damping_factor)
+        residual = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        yield ranks, residual
+
+
+def gauss_seidel(links, damping_factor, ranks):
+    """
+    Yields (ranks, residual) for each Gauss-Seidel sweep, which updates
+    BLOCKS blocks of pages in turn, each block already using the ranks
+    updated by the blocks before it.
+    """
+    n = len(links)
+    order = np.argsort(links.targets, kind="stable")
+    sources = links.sources[order]
+    targets = links.targets[order]
+    weights = 1 / links.out_degree[sources]
+    bounds = np.linspace(0, n, min(n, BLOCKS) + 1).astype(np.int64)
+    edges = np.searchsorted(targets, bounds)
+
+    while True:
+        previous = ranks.copy()
+        dangling = ranks[links.dangling].sum()
+        for lo, hi, first, last in zip(
+            bounds[:-1], bounds[1:], edges[:-1], edges[1:]
+        ):
+            followed = np.bincount(
+                targets[first:last] - lo,
+                weights=ranks[sources[first:last]] * weights[first:last],
+                minlength=hi - lo
+            )
+            block = (1 - damping_factor) / n + damping_factor * (
+                followed + dangling / n
+            )
+            dangling += (block - ranks[lo:hi])[links.dangling[lo:hi]].sum()
+            ranks[lo:hi] = block
+
+        # Unlike a power iteration, a sweep does not keep the total at 1
+        ranks /= ranks.sum()
+        yield ranks, np.abs(ranks - previous).sum()
+
+
+def aitken(links, damping_factor, ranks):
+    """
+    Yields (ranks, residual) for each power iteration, every EXTRAPOLATE
+    iterations replacing the ranks by their Aitken delta-squared
+    extrapolation from the last three iterates.
+    """
+    def extrapolate(history):
+        x0, x1, x2 = history[-3:]
+        second = x2 - 2 * x1 + x0
+        safe = np.abs(second) > 1e-15
+        ranks = x2.copy()
+        ranks[safe] = x2[safe] - (x2[safe] - x1[safe]) ** 2 / second[safe]
+        return np.where(ranks > 0, ranks, x2)
+    return extrapolating(links, damping_factor, ranks, extrapolate, 3)
+
+
+def quadratic(links, damping_factor, ranks):
+    """
+    Yields (ranks, residual) for each power iteration, every EXTRAPOLATE
+    iterations replacing the ranks by their quadratic extrapolation
+    (Kamvar et al.) from the last four iterates.
+    """
+    def extrapolate(history):
+        x0, x1, x2, x3 = history[-4:]
+        y = np.column_stack((x1 - x0, x2 - x0))
+        (g1, g2), *_ = np.linalg.lstsq(y, -(x3 - x0), rcond=None)
+        ranks = (g1 + g2 + 1) * x1 + (g2 + 1) * x2 + x3
+        return np.where(ranks > 0, ranks, x3)
+    return extrapolating(links, damping_factor, ranks, extrapolate, 4)
+
+
+def extrapolating(links, damping_factor, ranks, extrapolate, needed):
+    weights = 1 / links.out_degree[links.sources]
+    history = []
+    iteration = 0
+    while True:
+        new_ranks = step(links, ranks, weights, damping_factor)
+        residual = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        yield ranks, residual
+
+        iteration += 1
+        history = history[-(needed - 1):] + [ranks]
+        if iteration % EXTRAPOLATE == 0 and len(history) == needed:
+            ranks = extrapolate(history)
+            ranks = ranks / ranks.sum()
+            history = []
+
+
+SOLVERS = {
+    "jacobi": jacobi,
+    "gauss-seidel": gauss_seidel,
+    "aitken": aitken,
+    "quadratic": quadratic
+}
+
+
+def topic_pagerank(corpus, damping_factor, topics, tolerance=TOLERANCE):
+    """
+    Return PageRank values personalized to each topic, where `topics`
+    maps a topic name to the set of pages a random jump lands on.
+
+    Return a dictionary from topic name to a dictionary where keys are
+    page names, and values are their PageRank value for that topic.
+    """
+    links = Links.from_corpus(corpus)
+    names = list(topics)
+    ranks = personalized(
+        links, damping_factor,
+        teleport_matrix(links, [topics[name] for name in names]),
+        tolerance
+    )
+    return {
+        name: links.to_dict(ranks[:, j]) for j, name in enumerate(names)
+    }
+
+
+def teleport_matrix(links, seed_sets):
+    """
+    Returns an N x K matrix whose column j spreads a random jump
+    evenly over the pages of `seed_sets[j]`.
+    """
+    index = {page: i for i, page in enumerate(links.pages)}
+    teleport = np.zeros((len(links), len(seed_sets)))
+    for j, seeds in enumerate(seed_sets):
+        rows = sorted({index[page] for page in seeds})
+        if not rows:
+            raise ValueError(f"seed set {j} has no pages")
+        teleport[rows, j] = 1 / len(rows)
+    return teleport
+
+
+def personalized(links, damping_factor, teleport, tolerance=TOLERANCE,
+                 max_iterations=MAX_ITERATIONS, transition=None):
+    """
+    Returns the N x K matrix of PageRank vectors of `links`, one for each
+    column of `teleport`: a probability distribution over pages that
+    replaces the uniform random jump. A page without links jumps the
+    same way. `transition` is the `transition_matrix` of `links`, if
+    already built.
+
+    Each vector is the normalized solution y of y = (1 - d) t + d P y,
+    where P follows links only. All columns are iterated together, one
+    sparse-times-dense product per step, so the links are read once for
+    the whole block rather than once per vector. Each column stops once
+    it changes by less than `tolerance` (L1 norm, relative to its sum).
+    """
+    teleport = np.asarray(teleport, dtype=float)
+    n, k = teleport.shape
+    if transition is None:
+        transition = transition_matrix(links)
+    follow = damping_factor * transition
+    ones = np.ones(n)
+
+    # Random jumps land on few pages, so they are added entry by entry
+    rows, columns = np.nonzero(teleport)
+    jump = (1 - damping_factor) * teleport[rows, columns]
+
+    # Teleport column of each block column, and which are still running
+    active = np.arange(k)
+    running = np.ones(k, dtype=bool)
+
+    ranks = np.empty((n, k))
+    y = teleport.copy()
+    for iteration in range(1, max_iterations + 1):
+        new_y = follow @ y
+        new_y[rows, columns] += jump
+        if iteration % CHECK:
+            y = new_y
+            continue
+        np.subtract(new_y, y, out=y)
+        residuals = ones @ np.abs(y, out=y) / (ones @ new_y)
+        y = new_y
+
+        done = running & (residuals < tolerance)
+        if not done.any():
+            continue
+        ranks[:, active[done]] = y[:, done]
+        running &= ~done
+        if not running.any():
+            break
+
+        # Converged columns are copied out of the block only once at
+        # least half of it has converged, so copies stay rare
+        if 2 * running.sum() <= len(running):
+            kept = running[columns]
+            position = np.cumsum(running) - 1
+            rows, columns = rows[kept], position[columns[kept]]
+            jump = jump[kept]
+            y, active = y[:, running], active[running]
+            running = running[running]
+    else:
+        ranks[:, active[running]] = y[:, running]
+    return ranks / ranks.sum(axis=0)
+
+
+def transition_matrix(links):
+    """
+    Returns P as a sparse N x N matrix, where P[i, j] is the probability
+    of following a link from page j to page i.
+    """
+    n = len(links)
+    weights = 1 / np.maximum(links.out_degree, 1)
+    return sparse.csr_matrix(
+        (weights[links.sources], (links.targets, links.sources)),
+        shape=(n, n)
+    )
+
+
+def step(links, ranks, weights, damping_factor):
+    """
+    Returns the result of one power iteration from `ranks`,
+    given the per-edge `weights` 1 / out_degree(source).
+    """
+    n = len(links)
+    followed = np.bincount(
+        links.targets, weights=ranks[links.sources] * weights, minlength=n
+    )
+    dangling = ranks[links.dangling].sum() / n
+    return (1 - damping_factor) / n + damping_factor * (followed + dangling)
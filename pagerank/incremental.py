@@ -0,0 +1,146 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+import crawler
+import engine
+import pagerank
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python incremental.py corpus ranks.npz")
+    directory, path = sys.argv[1:]
+
+    links = crawler.crawl(directory)
+    previous = load_ranks(path) if os.path.exists(path) else None
+
+    start = time.perf_counter()
+    ranks, pushed = update(links, pagerank.DAMPING, previous)
+    seconds = time.perf_counter() - start
+    save_ranks(path, links, ranks)
+
+    kind = "warm" if previous is not None else "cold"
+    print(f"Updated {len(links)} pages from a {kind} start in "
+          f"{seconds:.3f} s, pushing along {pushed} links "
+          f"({pushed / max(1, len(links.sources)):.1f} passes over the graph)")
+
+
+def apply_delta(corpus, added=None, removed=None, linked=None, unlinked=None):
+    """
+    Return a new `crawl` dictionary from `corpus` with pages `added`
+    (a dictionary from page to the pages it links to) and `removed`,
+    and with (page, target) links `linked` and `unlinked`.
+    Links from or to pages outside the new corpus are dropped, as
+    crawl does.
+    """
+    corpus = {page: set(links) for page, links in corpus.items()}
+    for page in removed or ():
+        corpus.pop(page, None)
+    for page, links in (added or {}).items():
+        corpus[page] = set(links)
+    for page, target in linked or ():
+        if page in corpus:
+            corpus[page].add(target)
+    for page, target in unlinked or ():
+        if page in corpus:
+            corpus[page].discard(target)
+
+    for page in corpus:
+        corpus[page] = set(
+            link for link in corpus[page]
+            if link in corpus and link != page
+        )
+    return corpus
+
+
+def save_ranks(path, links, ranks):
+    """
+    Save the PageRank of every page of `links` to a NumPy .npz file.
+    """
+    with open(path, "wb") as f:
+        np.savez(f, pages=np.array(links.pages), ranks=ranks)
+
+
+def load_ranks(path):
+    """
+    Returns the dictionary from page to PageRank saved at `path`.
+    """
+    with np.load(path) as data:
+        return dict(zip(data["pages"].tolist(), data["ranks"].tolist()))
+
+
+def update(links, damping_factor, previous=None,
+           tolerance=engine.TOLERANCE):
+    """
+    Returns (ranks, links pushed along) for `links`, starting from
+    the `previous` PageRank of each page where there is one.
+    Pages new to the corpus start at 1 / N.
+
+    PageRank is the normalized solution of y = (1 - d) / N + d P y, where
+    P follows links only and pages without links lose their rank. Solving
+    for y instead leaves no term that touches every page, and since the
+    result is normalized, keeping the previous N keeps changes local.
+    """
+    n = len(previous) if previous else len(links)
+    ranks = np.full(len(links), 1 / n)
+    if previous:
+        ranks = np.array([previous.get(page, 1 / n) for page in links.pages])
+
+    # Scale the start to the size y has when it normalizes to `ranks`
+    dangling = ranks[links.dangling].sum()
+    ranks *= (1 - damping_factor) / (1 - damping_factor * (1 - dangling))
+
+    ranks, pushed = push(links, damping_factor, ranks,
+                         (1 - damping_factor) / n, tolerance)
+    return ranks / ranks.sum(), pushed
+
+
+def push(links, damping_factor, ranks, teleport, tolerance=engine.TOLERANCE):
+    """
+    Returns (y, links pushed along) after correcting an estimate `ranks`
+    of the solution y of y = teleport + d P y over `links` until its
+    residual is below `tolerance` (L1 norm).
+
+    The residual is how far one iteration would move each page.
+    Rather than iterating over the whole graph, each round settles
+    the pages whose residual is still large and pushes the change along
+    their links only, so edits to a few pages stay local.
+    """
+    n = len(links)
+    ranks = ranks.copy()
+    weights = 1 / np.maximum(links.out_degree, 1)
+    residual = teleport + damping_factor * np.bincount(
+        links.targets, weights=(ranks * weights)[links.sources], minlength=n
+    ) - ranks
+    threshold = tolerance / n
+    pushed = 0
+
+    while np.abs(residual).sum() >= tolerance:
+        active = np.flatnonzero(np.abs(residual) > threshold)
+        if not len(active):
+            break
+        delta = residual[active]
+        ranks[active] += delta
+        residual[active] = 0
+
+        # Spread the change along the links of the settled pages
+        degree = links.out_degree[active]
+        total = degree.sum()
+        positions = np.repeat(
+            links.offsets[active] - np.cumsum(degree) + degree, degree
+        ) + np.arange(total)
+        residual += damping_factor * np.bincount(
+            links.linked[positions],
+            weights=np.repeat(delta * weights[active], degree),
+            minlength=n
+        )
+        pushed += total
+
+    return ranks, pushed
+
+
+if __name__ == "__main__":
+    main()
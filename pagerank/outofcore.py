@@ -0,0 +1,203 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from array import array
+
+import numpy as np
+
+import crawler
+import engine
+import pagerank
+
+# Files making up a link store
+PAGES = "pages.txt"
+EDGES = "edges.bin"
+DEGREE = "degree.bin"
+HEADER = "store.json"
+
+# Default memory ceiling for ranking, in bytes
+MEMORY = 256 << 20
+
+# Bytes resident per page while ranking: ranks, new ranks, ranks scaled
+# by out-degree, 1 / out-degree, links followed, the counts of one block
+# and whether the page has no links
+PAGE_BYTES = 6 * 8 + 1
+
+# Bytes resident per link of the block being streamed: the mapped
+# (source, target) pair, its weighted rank and its widened target
+LINK_BYTES = 8 + 8 + 8
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank a link store too large to fit in memory."
+    )
+    parser.add_argument("store", help="link store directory")
+    parser.add_argument("--corpus",
+                        help="corpus directory to (re)build the store from")
+    parser.add_argument("--memory", type=int, default=MEMORY >> 20,
+                        help="memory ceiling for ranking, in MiB")
+    parser.add_argument("--workers", type=int,
+                        help="processes parsing the corpus")
+    args = parser.parse_args()
+
+    if args.corpus is not None:
+        start = time.perf_counter()
+        build(args.corpus, args.store, args.workers)
+        print(f"Built {args.store} in {time.perf_counter() - start:.3f} s")
+
+    start = time.perf_counter()
+    ranks, iterations = rank(args.store, pagerank.DAMPING,
+                             memory=args.memory << 20)
+    print(f"Ranked {len(ranks)} pages in {iterations} iterations, "
+          f"{time.perf_counter() - start:.3f} s")
+
+    top = ranks.argsort()[::-1][:10]
+    wanted = set(top.tolist())
+    names = {
+        i: page for i, page in enumerate(read_pages(args.store))
+        if i in wanted
+    }
+    print("Top pages")
+    for i in top:
+        print(f"  {names[i]}: {ranks[i]:.4f}")
+
+
+def build(directory, store, workers=None, block=1 << 20):
+    """
+    Parse every HTML page under `directory` as crawler.crawl does and
+    write its links to a link store at `store`, `block` links at a time.
+
+    Pages are parsed in sorted order, so links come out sorted by source
+    and, once each page's targets are sorted, by target, and are written
+    to disk without ever holding the whole edge list.
+    """
+    pages = sorted(crawler.find_pages(directory))
+    index = {page: i for i, page in enumerate(pages)}
+    tasks = [(directory, page) for page in pages]
+
+    if workers == 1:
+        results = map(crawler.extract_links, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap(crawler.extract_links, tasks,
+                            chunksize=max(1, len(tasks) // 256))
+
+    os.makedirs(store, exist_ok=True)
+    degree = np.zeros(len(pages), dtype=np.int32)
+    count = 0
+    try:
+        with open(os.path.join(store, EDGES), "wb") as f:
+            buffer = array("i")
+            for source, links in enumerate(results):
+                targets = sorted(
+                    target for target in map(index.get, links)
+                    if target is not None and target != source
+                )
+                degree[source] = len(targets)
+                for target in targets:
+                    buffer.append(source)
+                    buffer.append(target)
+                if len(buffer) >= 2 * block:
+                    count += len(buffer) // 2
+                    buffer.tofile(f)
+                    del buffer[:]
+            count += len(buffer) // 2
+            buffer.tofile(f)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    write_header(store, pages, degree, count)
+
+
+def save(links, store):
+    """
+    Write an in-memory engine.Links edge list to a link store at `store`.
+    """
+    os.makedirs(store, exist_ok=True)
+    order = np.lexsort((links.targets, links.sources))
+    edges = np.column_stack((links.sources[order], links.targets[order]))
+    edges.astype(np.int32).tofile(os.path.join(store, EDGES))
+    write_header(store, links.pages, links.out_degree.astype(np.int32),
+                 len(edges))
+
+
+def write_header(store, pages, degree, count):
+    with open(os.path.join(store, PAGES), "w", encoding="utf-8") as f:
+        for page in pages:
+            f.write(f"{page}\n")
+    degree.tofile(os.path.join(store, DEGREE))
+    with open(os.path.join(store, HEADER), "w") as f:
+        json.dump({"pages": len(pages), "links": count}, f)
+
+
+def read_pages(store):
+    """
+    Yields the name of every page of the link store at `store`, in order.
+    """
+    with open(os.path.join(store, PAGES), encoding="utf-8") as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def blocks(store, size):
+    """
+    Yields (sources, targets) for each block of up to `size` links of the
+    link store at `store`, mapping only that block into memory.
+    """
+    with open(os.path.join(store, HEADER)) as f:
+        count = json.load(f)["links"]
+    path = os.path.join(store, EDGES)
+    for start in range(0, count, size):
+        edges = np.memmap(path, dtype=np.int32, mode="r", offset=8 * start,
+                          shape=(min(size, count - start), 2))
+        yield edges[:, 0], edges[:, 1]
+        del edges
+
+
+def rank(store, damping_factor, tolerance=engine.TOLERANCE,
+         max_iterations=engine.MAX_ITERATIONS, memory=MEMORY):
+    """
+    Returns (ranks, iterations): the PageRank vector of the link store at
+    `store`, computed by the same power iteration as engine.jacobi.
+
+    Only vectors over pages stay in memory. Each iteration streams the
+    links from disk in blocks sized to keep within `memory` bytes.
+    """
+    with open(os.path.join(store, HEADER)) as f:
+        n = json.load(f)["pages"]
+    size = (memory - PAGE_BYTES * n) // LINK_BYTES
+    if size < 1:
+        raise ValueError(
+            f"memory ceiling of {memory} bytes is too small for {n} pages"
+        )
+
+    degree = np.fromfile(os.path.join(store, DEGREE), dtype=np.int32)
+    dangling = degree == 0
+    weights = 1 / np.maximum(degree, 1)
+    del degree
+
+    ranks = np.full(n, 1 / n)
+    for iteration in range(1, max_iterations + 1):
+        scaled = ranks * weights
+        followed = np.zeros(n)
+        for sources, targets in blocks(store, size):
+            counts = np.bincount(targets, weights=scaled[sources])
+            followed[:len(counts)] += counts
+        new_ranks = (1 - damping_factor) / n + damping_factor * (
+            followed + ranks[dangling].sum() / n
+        )
+        residual = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if residual < tolerance:
+            break
+    return ranks / ranks.sum(), iteration
+
+
+if __name__ == "__main__":
+    main()
@@ -122,7 +122,7 @@ def iterate_pagerank(corpus, damping_factor):
             ranks_dict[page] = ((1 - damping_factor) / n) + (damping_factor * sigma_function(page, corpus, res_dict))
         checker = True
         for page in res_dict:
-            if round(ranks_dict[page] - res_dict[page], 3) > 0.001:
+            if abs(ranks_dict[page] - res_dict[page]) > 0.001:
                 checker = False
                 break                
         if checker == True: